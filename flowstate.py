@@ -1,29 +1,30 @@
 import streamlit as st
 import os
-import pandas as pd
-from PIL import Image
 import tempfile
+import atexit
+import functools
 import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from streamlit.components.v1 import html
 
 
 # Import the helper modules
 try:
     from jiu_jitsu_functions import (
+        get_genai,
         generate_grappling_plan,
-        analyse_grappling_match,
         sanitize_mermaid,
+        mermaid_re,
+        strip_debug,
         generate_flow_chart_with_start,
-        generate_flow_chart,
-        gracie_talk,
-        render_mermaid,
-        generate_mermaid,
-        display_graph,
+        build_mermaid_html,
         next_move,
         get_attributes,
+        get_attributes_prompt,
         adversarial_game_plan,
-        format_strategy_for_display,
-        display_strategy_battle,
+        adversarial_game_plan_batch,
+        stream_adversarial_game_plan,
         get_image_base64,
         save_default_waiting_images,
         format_strategy_content,
@@ -31,8 +32,6 @@ try:
         get_video_duration,
         generate_video_thumbnail,     
     )    
-    from genai import GenAI
-    from movieai import MovieAI
 except Exception as e:
     st.error(f"Error importing required modules: {str(e)}")
     st.stop()
@@ -40,318 +39,231 @@ except Exception as e:
 # Set page configuration
 st.set_page_config(page_title="Jiu-Jitsu Genie", layout="wide")
 
-# Custom CSS for black and white theme
-st.markdown("""
-<style>
-    /* Force the full page background to have diagonal belt stripes */
-    .stApp {
-        background: repeating-linear-gradient(
-            45deg,
-            #ffffff 0px,  /* White belt */
-            #ffffff 25px,
-            #0052cc 25px, /* Blue belt - deeper royal blue */
-            #0052cc 50px,
-            #6200ee 50px, /* Purple belt - richer purple */
-            #6200ee 75px,
-            #8B4513 75px, /* Brown belt - improved more authentic brown */
-            #8B4513 100px,
-            #1a1a1a 100px, /* Black belt - improved darker black */
-            #1a1a1a 125px,
-            #ff0000 125px, /* Red belt - brighter red */
-            #ff0000 150px
-        ) !important;
-        background-attachment: fixed !important;
-    }
-    
-    /* Make main content area and widgets have semi-transparent backgrounds */
-    .block-container, div.stButton, div.stTextInput, div.stTextArea, div.stSelectbox {
-        background-color: rgba(255, 255, 255, 0.85);
-        border-radius: 5px;
-        padding: 5px;
-    }
-    
-    /* Apply to specific Streamlit components to ensure they're visible against the background */
-    .stTextInput > div, .stTextArea > div, .stSelectbox > div {
-        background-color: rgba(255, 255, 255, 0.95);
-    }
-    
-    /* Ensure text remains readable */
-    .stMarkdown, p, h1, h2, h3, h4, h5, h6, label {
-        text-shadow: 0px 0px 3px rgba(255, 255, 255, 0.8);
-    }
-    
-    /* Create a container for the app content with some padding and opacity */
-    .main .block-container {
-        padding: 30px;
-        background-color: rgba(255, 255, 255, 0.85);
-        border-radius: 10px;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
-    }
-    
-    /* Style the sidebar to match */
-    .stSidebar .block-container {
-        background-color: rgba(240, 240, 240, 0.9);
-        padding: 20px;
-    }
-    
-    /* Add a belt stripe to titles */
-    h1, h2, h3 {
-        position: relative;
-        padding-bottom: 10px;
-        margin-bottom: 15px;
-    }
-    
-    h1::after, h2::after, h3::after {
-        content: "";
-        position: absolute;
-        bottom: 0;
-        left: 0;
-        height: 5px;
-        width: 100%;
-        background: linear-gradient(
-            to right,
-            #ffffff,   /* White belt */
-            #0066cc,   /* Blue belt */
-            #660099,   /* Purple belt */
-            #993300,   /* Brown belt */
-            #000000,   /* Black belt */
-            #cc0000    /* Red belt */
-        );
-        border-radius: 2px;
-    }
-    
-    /* The rest of your existing CSS styles */
-    /* Base styles */
-    .main {
-        color: black;
-    }
-    .stButton button {
-        background-color: black;
-        color: white;
-        border-radius: 5px;
-    }
-    .stTextInput, .stTextArea, .stSelectbox {
-        border: 1px solid black;
-    }
-    
-    /* Highlight box for recommendations/strategies */
-    .highlight {
-        background-color: rgba(248, 248, 248, 0.9);
-        padding: 15px;
-        border-radius: 5px;
-        margin-bottom: 15px;
-        border-left: 5px solid #333;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-    }
-    
-    /* Error styling */
-    .error {
-        color: red;
-        font-weight: bold;
-    }
-    
-    /* Section dividers */
-    .section-divider {
-        margin-top: 30px;
-        margin-bottom: 20px;
-        border-top: 1px solid #ddd;
-    }
-    
-    /* Tab content padding */
-    .tab-content {
-        padding: 20px 0;
-    }
-    
-    /* Jiu-Jitsu Belt Colors for Strategy Columns */
-    /* White Belt (Initiator/Beginner) */
-    .white-belt {
-        background-color: rgba(255, 255, 255, 0.9);
-        border-radius: 8px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 5px solid #dddddd;
-        border-bottom: 3px solid #dddddd;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-    }
-    
-    /* Blue Belt (Early Intermediate) - Updated color */
-    .blue-belt {
-        background-color: rgba(230, 242, 255, 0.9);
-        border-radius: 8px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 5px solid #0052cc;
-        border-bottom: 3px solid #0052cc;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-    }
-    
-    /* Purple Belt (Advanced Intermediate) - Updated color */
-    .purple-belt {
-        background-color: rgba(245, 230, 255, 0.9);
-        border-radius: 8px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 5px solid #6200ee;
-        border-bottom: 3px solid #6200ee;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-    }
-            
-    /* Brown Belt (Advanced) - Updated color */
-    .brown-belt {
-        background-color: rgba(255, 242, 230, 0.9);
-        border-radius: 8px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 5px solid #8B4513;
-        border-bottom: 3px solid #8B4513;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-    }
-    
-    /* Black Belt (Expert/Master) - Updated color */
-    .black-belt {
-        background-color: rgba(240, 240, 240, 0.9);
-        border-radius: 8px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 5px solid #1a1a1a;
-        border-bottom: 3px solid #1a1a1a;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-    }
-    
-    /* Red Belt (Grand Master) - Updated color */
-    .red-belt {
-        background-color: rgba(255, 230, 230, 0.9);
-        border-radius: 8px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 5px solid #ff0000;
-        border-bottom: 3px solid #ff0000;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-    }
-    
-    /* Strategy Entry Styling */
-    .strategy-entry {
-        margin-bottom: 15px;
-        padding: 10px;
-        border-radius: 5px;
-        background-color: rgba(255, 255, 255, 0.6);
-    }
-    
-    /* Belt gradient for the column headers */
-    .belt-header {
-        background: linear-gradient(to right, #FFFFFF, #0066cc, #660099, #993300, #000000, #cc0000);
-        color: white;
-        padding: 10px;
-        border-radius: 5px 5px 0 0;
-        font-weight: bold;
-        text-align: center;
-        margin-bottom: 10px;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.7);
-    }
-    
-    /* Strategy battle container */
-    .strategy-battle {
-        max-height: 600px;
-        overflow-y: auto;
-        padding: 15px;
-        border: 1px solid #eee;
-        border-radius: 8px;
-        background-color: rgba(250, 250, 250, 0.8);
-        margin-bottom: 20px;
-    }
-    
-    /* Custom bullet points styled like belt stripes */
-    ul.belt-bullets {
-        list-style: none;
-        padding-left: 5px;
-    }
-    
-    ul.belt-bullets li {
-        position: relative;
-        padding-left: 20px;
-        margin-bottom: 8px;
-    }
-    
-    ul.belt-bullets li:before {
-        content: "";
-        position: absolute;
-        left: 0;
-        top: 8px;
-        width: 12px;
-        height: 3px;
-        background-color: #333;
-    }
-    
-    /* Button styling for the "But I thought of that..." buttons */
-    .counter-button {
-        width: 100%;
-        background-color: rgba(248, 248, 248, 0.9) !important;
-        color: #333 !important;
-        border: 1px solid #ddd !important;
-        padding: 8px 16px !important;
-        text-align: center !important;
-        text-decoration: none !important;
-        display: inline-block !important;
-        font-size: 14px !important;
-        margin: 10px 0 !important;
-        cursor: pointer !important;
-        border-radius: 4px !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .counter-button:hover {
-        background-color: rgba(224, 224, 224, 0.9) !important;
-        border-color: #bbb !important;
-    }
-    
-    /* Improve code block readability */
-    pre {
-        background-color: rgba(240, 240, 240, 0.95) !important;
-        padding: 10px !important;
-        border-radius: 5px !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for black and white theme, kept in style.css and read once per server process
+@st.cache_resource
+def _css_blob():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css"), "r") as css_file:
+        return f"<style>\n{css_file.read()}</style>"
+
+st.markdown(_css_blob(), unsafe_allow_html=True)
 
 # Initialize session state variables if they don't exist
-if 'current_image' not in st.session_state:
-    st.session_state.current_image = None
-if 'current_chat' not in st.session_state:
-    st.session_state.current_chat = []
-if 'current_flowchart' not in st.session_state:
-    st.session_state.current_flowchart = None
-if 'counter_flowchart' not in st.session_state:
-    st.session_state.counter_flowchart = None
-if 'current_video' not in st.session_state:
-    st.session_state.current_video = None
-if 'current_attributes' not in st.session_state:
-    st.session_state.current_attributes = ""
-if 'selected_master' not in st.session_state:
-    st.session_state.selected_master = None
-if 'flow_position' not in st.session_state:
-    st.session_state.flow_position = None
-if 'flow_ideas' not in st.session_state:
-    st.session_state.flow_ideas = None
-if 'current_master' not in st.session_state:
-    st.session_state.current_master = None
-if 'app_function' not in st.session_state:
-    st.session_state.app_function = "Position Image Recommendations"
+_DEFAULTS = {
+    'current_image': None,
+    'current_image_b64': None,
+    'current_image_hash': None,
+    'current_flowchart': None,
+    'current_flowchart_nodes': frozenset(),
+    'counter_flowchart': None,
+    'current_video': None,
+    'current_attributes': "",
+    'selected_master': None,
+    'flow_position': None,
+    'flow_ideas': None,
+    'current_master': None,
+    'app_function': "Position Image Recommendations",
+}
+for key, value in _DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+# The chat list is mutated in place, so each session gets its own list rather than a shared default
+st.session_state.setdefault('current_chat', [])
+
+# Fallback masters list used when masters.txt is missing
+DEFAULT_MASTERS = ("John Danaher", "Rickson Gracie", "Roger Gracie", "Marcelo Garcia", "Gordon Ryan", 
+                   "Kyra Gracie", "Helio Gracie", "Carlos Gracie", "Eddie Bravo", "Andre Galvao", 
+                   "Buchecha", "Keenan Cornelius", "Bernardo Faria", "Renzo Gracie", "Jean Jacques Machado")
 
-# Load masters list
+# Load masters list (read from disk at most hourly, then served from the cache on every rerun)
+# along with a name -> index map so the selectbox default is found without scanning the list.
+# cache_resource hands back the same immutable objects instead of unpickling a copy per rerun
+@st.cache_resource(ttl=3600)
 def load_masters():
     try:
         with open("masters.txt", "r") as file:
-            masters = [line.strip() for line in file if line.strip()]
-        return masters
+            masters = tuple(line.strip() for line in file if line.strip())
     except FileNotFoundError:
-        return ["John Danaher", "Rickson Gracie", "Roger Gracie", "Marcelo Garcia", "Gordon Ryan", 
-                "Kyra Gracie", "Helio Gracie", "Carlos Gracie", "Eddie Bravo", "Andre Galvao", 
-                "Buchecha", "Keenan Cornelius", "Bernardo Faria", "Renzo Gracie", "Jean Jacques Machado"]
+        masters = DEFAULT_MASTERS
+    # Reversed so a duplicated name maps to its first position, like list.index()
+    master_idx = {name: idx for idx, name in reversed(tuple(enumerate(masters)))}
+    return masters, master_idx
+
+# Temp files (uploaded videos, thumbnails, trims) are bounded per session and removed on server exit
+MAX_TEMP_FILES = 5
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+@st.cache_resource
+def _temp_file_registry():
+    paths = set()
+    atexit.register(lambda: _remove_files(list(paths)))
+    return paths
+
+def track_temp_file(path):
+    registry = _temp_file_registry()
+    registry.add(path)
+    tmpfiles = st.session_state.setdefault("_tmpfiles", [])
+    if path in tmpfiles:
+        return
+    tmpfiles.append(path)
+    
+    # Drop this session's oldest files, keeping the video, thumbnail and trim that are still displayed
+    if len(tmpfiles) > MAX_TEMP_FILES:
+        current_video = st.session_state.get("current_video")
+        in_use = {current_video, f"{current_video}.jpg", st.session_state.get("trimmed_video"), path}
+        for old_path in tmpfiles[:-MAX_TEMP_FILES]:
+            if old_path not in in_use:
+                _remove_files([old_path])
+                registry.discard(old_path)
+                tmpfiles.remove(old_path)
+
+# Write an upload to disk once; later reruns reuse the same temp file. The content is only hashed
+# when the uploader reports a new file_id, so re-uploading the same video keeps the existing file
+# (and everything cached on its path) instead of writing a second copy.
+# Returns (path, content_hash); the hash is the cache key for anything derived from the video.
+def _persist_upload(uploaded_file, suffix):
+    saved = st.session_state.get("_persisted_upload")
+    if saved and saved[0] == uploaded_file.file_id and os.path.exists(saved[2]):
+        return saved[2], saved[1]
+    
+    content_hash = hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
+    if saved and saved[1] == content_hash and os.path.exists(saved[2]):
+        path = saved[2]
+    else:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+            tmp_file.write(uploaded_file.getbuffer())
+            path = tmp_file.name
+        track_temp_file(path)
+    st.session_state._persisted_upload = (uploaded_file.file_id, content_hash, path)
+    return path, content_hash
+
+# Master Talk system prompt; only the master's name varies, so every request for a master starts with
+# a byte-identical prefix that OpenAI's automatic prompt caching can reuse across turns
+MASTER_TALK_SYSTEM_PROMPT = (
+    "You are the jiu-jitsu master {master}. Have a conversation to me as this master and provide me "
+    "troubleshooting help on my jiu-jitsu based on your fundamental principles of jiujitsu and notable "
+    "successes. Try to keep the analysis brief like a conversation."
+)
+
+# Sanitize each raw chart once; display, download and fallback paths share the result
+@st.cache_data(max_entries=64, show_spinner=False)
+def sanitized(raw_flowchart):
+    return sanitize_mermaid(raw_flowchart)
+
+# Format each OODA strategy once; historical rows are static and reuse the cached HTML
+@st.cache_data(max_entries=256, show_spinner=False)
+def _fmt(content):
+    return format_strategy_content(content)
+
+# Matches mermaid node labels such as ["Closed Guard"] or [Closed Guard]
+_NODE_RE = mermaid_re.compile(r'\[\s*"?([^"\]\n]+?)"?\s*\]')
+
+# Memoize the example node labels shown under the Flow button; only re-parsed when the chart changes
+@st.cache_data(show_spinner=False)
+def extract_node_examples(flowchart, exclude, n=3):
+    nodes = []
+    seen = set()
+    # finditer stops scanning as soon as n labels are found instead of collecting every match
+    for match in _NODE_RE.finditer(flowchart):
+        node_text = match.group(1).strip()
+        if node_text and node_text not in seen and node_text != exclude:
+            seen.add(node_text)
+            nodes.append(node_text)
+            if len(nodes) >= n:
+                break
+    return nodes
+
+# Matches mermaid arrow labels such as -->|"Grip sleeve"|
+_EDGE_RE = mermaid_re.compile(r'\|\s*"?([^"|\n]+)"?\s*\|')
+
+# Matches the id in front of a node label, such as A in A["Closed Guard"]
+_NODE_ID_RE = mermaid_re.compile(r'(\w+)\s*\[')
+
+# Lowercased node ids, node labels and transition labels of a chart, for O(1) "is this move in
+# the chart" checks. Parsed once when a chart is stored, then kept in session state next to it.
+@st.cache_data(show_spinner=False)
+def flowchart_tokens(flowchart):
+    labels = _NODE_RE.findall(flowchart) + _EDGE_RE.findall(flowchart) + _NODE_ID_RE.findall(flowchart)
+    return frozenset(label.strip().lower() for label in labels)
+
+# Build the video client once per API key so reruns reuse the same HTTP connection pool.
+# get_genai comes from jiu_jitsu_functions, so the page code and the helpers share one GenAI client.
+# movieai is only imported here, so sessions that never open Video Match Analysis don't load it.
+@st.cache_resource
+def get_movieai(api_key):
+    from movieai import MovieAI
+    return MovieAI(api_key)
+
+# Shared worker threads for API calls that can overlap with work on the script thread.
+# Jobs submitted here must not call st.* since they run outside the script context.
+@st.cache_resource
+def _background_pool():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="flowstate")
+
+# Short content fingerprint for cache keys; blake2b is faster than sha256 and 16 bytes is plenty here
+def image_digest(image_bytes):
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+# Encode each image once; recommendations, attributes and the flow chart all reuse the same string
+@st.cache_data(max_entries=32, show_spinner=False)
+def image_b64(image_bytes):
+    return base64.b64encode(image_bytes).decode('utf-8')
+
+def image_data_url(encoded_image):
+    return f"data:image/jpeg;base64,{encoded_image}"
+
+# Simplified chart shown when the generated one fails to render
+@functools.lru_cache(maxsize=64)
+def _fallback_chart(position):
+    return f"""
+                graph TD
+                    A["{position}"] -->|"Move 1"| B["Position 1"]
+                    A -->|"Move 2"| C["Position 2"]
+                    B -->|"Action"| D["Submission 1"]
+                    C -->|"Action"| E["Submission 2"]
+                """
+
+# Video duration only depends on the video content. Keyed on the content hash rather than the
+# temp path, so the same clip uploaded in another session (at a new path) is still a cache hit.
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_video_duration(video_hash, _video_path):
+    return get_video_duration(_video_path)
+
+# Format time as MM:SS for display (the sliders call this with the same values on every rerun)
+@functools.lru_cache(maxsize=512)
+def format_time(seconds):
+    minutes = int(seconds // 60)
+    secs = int(seconds % 60)
+    return f"{minutes:02d}:{secs:02d}"
+
+# Image-based helpers are keyed on the image content hash; the bytes themselves are not hashed again.
+# Error strings are raised instead of returned so failed calls are never cached.
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def cached_grappling_plan(image_hash, position_variable, isMMA, keywords, _image):
+    recommendations = generate_grappling_plan(_image, position_variable, isMMA, keywords)
+    if recommendations.startswith("Error"):
+        raise RuntimeError(recommendations)
+    return recommendations
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def cached_attributes(image_hash, player_variable, _image):
+    attributes = get_attributes(_image, player_variable)
+    if attributes.startswith("Error"):
+        raise RuntimeError(attributes)
+    return attributes
+
+# Page names in sidebar order, with their positions for the selectbox default
+_APP_FUNCS = ("Position Image Recommendations", "Master Talk", "FLOW Chart Generator", "Video Match Analysis", "Anime OODA Analysis")
+_APP_IDX = {name: idx for idx, name in enumerate(_APP_FUNCS)}
 
 app_function_sidebar = st.sidebar.selectbox(
     "Choose a function",
-    ["Position Image Recommendations", "Master Talk", "FLOW Chart Generator", "Video Match Analysis", "Anime OODA Analysis"],
-    index=["Position Image Recommendations", "Master Talk", "FLOW Chart Generator", "Video Match Analysis", "Anime OODA Analysis"].index(st.session_state.app_function)
+    _APP_FUNCS,
+    index=_APP_IDX[st.session_state.app_function]
 )
 
 # Update session state when sidebar selection changes
@@ -378,38 +290,44 @@ if 'OPENAI_API_KEY' not in os.environ:
     else:
         st.sidebar.warning("Please enter your OpenAI API Key")
 
+# Each page is a function so only the selected one runs; where Streamlit supports fragments (1.37+),
+# widget interactions inside a page rerun just that page instead of the whole script
+_fragment = getattr(st, "fragment", lambda func: func)
+
 # Function: Position Image Recommendations
-if st.session_state.app_function == "Position Image Recommendations":
+@_fragment
+def _render_positions():
     st.title("Position Image Recommendations")
     
     # Image upload
     uploaded_file = st.file_uploader("Upload an image of a jiu-jitsu position", 
                                 type=['jpg', 'jpeg', 'png'],
                                 key="position_image_uploader")
-    image_location = None
     
-    # Display the uploaded image
+    # Display the uploaded image; Streamlit reads the upload itself, no PIL decode needed
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Uploaded Image", width=300)
-        
-        # Save the image temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-            image_location = tmp_file.name
-            image.save(image_location)
+        st.image(uploaded_file, caption="Uploaded Image", width=300)
         
-        # Update session state
-        st.session_state.current_image = image_location
+        # Update session state; copy, hash and encode the bytes only when a new file is uploaded,
+        # not on every rerun. The upload stays in memory instead of being re-saved to disk
+        if st.session_state.get("_image_file_id") != uploaded_file.file_id:
+            image_bytes = uploaded_file.getvalue()
+            st.session_state.current_image = image_bytes
+            st.session_state.current_image_b64 = image_b64(image_bytes)
+            st.session_state.current_image_hash = image_digest(image_bytes)
+            st.session_state._image_file_id = uploaded_file.file_id
     
-    # User inputs
-    position_variable = st.text_input("Enter the jiu-jitsu position")
-    isMMA = st.selectbox("Ruleset is MMA?", ["True", "False"]) == "True"
-    keywords = st.text_area("Enter your ideas or keywords", height=100)
-    st.session_state.current_attributes = st.text_input("Athlete relative build (AI content policies prevent auto-analyzing this)")
+    # User inputs, batched in a form so the page only reruns when the request is submitted
+    with st.form("position_form"):
+        position_variable = st.text_input("Enter the jiu-jitsu position")
+        isMMA = st.selectbox("Ruleset is MMA?", ["True", "False"]) == "True"
+        keywords = st.text_area("Enter your ideas or keywords", height=100)
+        st.session_state.current_attributes = st.text_input("Athlete relative build (AI content policies prevent auto-analyzing this)")
+        generate_clicked = st.form_submit_button("Generate Recommendations")
     
     # Process button
-    if st.button("Generate Recommendations"):
-        if not image_location or not position_variable or not keywords:
+    if generate_clicked:
+        if uploaded_file is None or not position_variable or not keywords:
             st.error("Please fill in all fields and upload an image")
         else:
             with st.spinner("Analyzing position and generating recommendations..."):
@@ -418,11 +336,12 @@ if st.session_state.app_function == "Position Image Recommendations":
                     enhanced_keywords = keywords + " " + st.session_state.current_attributes
                     
                     # Generate recommendations
-                    recommendations = generate_grappling_plan(image_location, position_variable, isMMA, enhanced_keywords)
+                    recommendations = cached_grappling_plan(st.session_state.current_image_hash, position_variable,
+                                                            isMMA, enhanced_keywords,
+                                                            image_data_url(st.session_state.current_image_b64))
                     
                     # Clean up the response if needed (remove debug info)
-                    if "DEBUG INFO:" in recommendations and "RESPONSE:" in recommendations:
-                        recommendations = recommendations.split("RESPONSE:")[1].strip()
+                    recommendations = strip_debug(recommendations)
                     
                     # Display recommendations in a bounded text box
                     st.markdown("### Recommendations")
@@ -433,15 +352,16 @@ if st.session_state.app_function == "Position Image Recommendations":
                     st.error(f"An error occurred: {str(e)}")
 
 # Function: Master Talk
-elif st.session_state.app_function == "Master Talk":
+@_fragment
+def _render_master_talk():
     st.title("Master Talk")
     
     # Load masters list
-    masters = load_masters()
+    masters, master_idx = load_masters()
     
     # Use selected master from session state if available
-    if st.session_state.selected_master in masters:
-        default_index = masters.index(st.session_state.selected_master)
+    if st.session_state.selected_master in master_idx:
+        default_index = master_idx[st.session_state.selected_master]
         st.session_state.selected_master = None  # Reset after use
     else:
         default_index = 0
@@ -457,95 +377,105 @@ elif st.session_state.app_function == "Master Talk":
         # Update the current master
         st.session_state.current_master = master_info
     
-    # Initialize chat if needed (either first time or after master change)
-    if len(st.session_state.current_chat) == 0:
-        instructions = f"You are the jiu-jitsu master {master_info}. Have a conversation to me as this master and provide me troubleshooting help on my jiu-jitsu based on your fundamental principles of jiujitsu and notable successes."
-        prompt = "Start a conversation to help me with my jiu-jitsu"
-        
-        # Initialize GenAI
-        if 'OPENAI_API_KEY' in os.environ:
-            genai = GenAI(os.environ.get("OPENAI_API_KEY"))
-            initial_response = genai.generate_text(prompt, instructions)
-            
-            # Clean up the response if needed
-            if "[Debug:" in initial_response:
-                initial_response = initial_response.split("[Debug:")[0].strip()
-            
-            # Update chat history
-            st.session_state.current_chat = [
-                {"role": "system", "content": instructions},
-                {"role": "user", "content": prompt},
-                {"role": "assistant", "content": initial_response}
-            ]
+    # The chat is kept in API message format, starting with this master's system prompt, so
+    # it can be sent as is without rebuilding the message list on every turn
+    if not st.session_state.current_chat:
+        st.session_state.current_chat.append(
+            {"role": "system", "content": MASTER_TALK_SYSTEM_PROMPT.format(master=master_info)}
+        )
+    
+    # Initialize chat if needed (either first time or after master change). The opening message
+    # is only generated on request, so visiting the page or browsing masters costs no API call.
+    begin_slot = None
+    if len(st.session_state.current_chat) == 1:
+        begin_slot = st.empty()
+        begin = begin_slot.button("Begin with this master")
+        if begin and 'OPENAI_API_KEY' not in os.environ:
+            st.warning("Please enter your OpenAI API Key")
+        elif begin:
+            opening = {"role": "user", "content": "Start a conversation to help me with my jiu-jitsu"}
+            initial_messages = st.session_state.current_chat + [opening]
+            try:
+                with st.spinner(f"Master {master_info} is thinking..."):
+                    genai = get_genai(os.environ["OPENAI_API_KEY"])
+                    completion = genai.client.chat.completions.create(
+                        model="gpt-4o-mini",
+                        response_format={"type": "text"},
+                        messages=initial_messages
+                    )
+                    initial_response = completion.choices[0].message.content
+                
+                # Update chat history and drop the button now the conversation has started
+                st.session_state.current_chat.append(opening)
+                st.session_state.current_chat.append({"role": "assistant", "content": initial_response})
+                begin_slot.empty()
+            except Exception as e:
+                st.error(f"Error starting the conversation: {str(e)}")
     
     # Display chat history
     st.markdown("### Conversation")
     chat_container = st.container()
     
     with chat_container:
-        for message in st.session_state.current_chat:
-            if message["role"] != "system":
-                role = "You" if message["role"] == "user" else f"Master {master_info}"
-                st.markdown(f"**{role}**: {message['content']}")
+        # The first message is the system prompt, which isn't shown
+        for message in st.session_state.current_chat[1:]:
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
     
-    # Chat input
-    next_comment = st.text_input("Your message:")
+    # Chat input; it only reruns the script once a message is submitted
+    next_comment = st.chat_input(f"Your message to Master {master_info}")
     
-    if st.button("Send", key="send_chat") and next_comment:
+    if next_comment:
         if 'OPENAI_API_KEY' in os.environ:
-            genai = GenAI(os.environ.get("OPENAI_API_KEY"))
-            instructions = f"You are the jiu-jitsu master {master_info}. Have a conversation to me as this master and provide me troubleshooting help on my jiu-jitsu based on your fundamental principles of jiujitsu and notable successes. Try to keep the analysis brief like a conversation."
-            
-            # Create a message list for the API call without modifying the original
-            messages_for_api = [
-                {"role": "system", "content": instructions}
-            ]
-            
-            # Add all non-system messages from the current chat
-            for msg in st.session_state.current_chat:
-                if msg["role"] != "system":
-                    messages_for_api.append(msg.copy())
-            
-            # Add the new user message
-            messages_for_api.append({"role": "user", "content": next_comment})
+            # The chat already is the API message list, so the new message is appended in place
+            # and the list is sent by reference (it is taken back out if the request fails)
+            chat = st.session_state.current_chat
+            chat.append({"role": "user", "content": next_comment})
             
             try:
-                # Call the OpenAI API directly without using generate_chat_response
-                if not genai.client:
-                    import openai
-                    genai.client = openai.Client(api_key=genai.openai_api_key)
+                genai = get_genai(os.environ["OPENAI_API_KEY"])
                 
-                # Make the API call
-                completion = genai.client.chat.completions.create(
+                # Stream the reply so the first tokens render while the rest is generated
+                stream = genai.client.chat.completions.create(
                     model="gpt-4o-mini",
                     response_format={"type": "text"},
-                    messages=messages_for_api
+                    messages=chat,
+                    stream=True
                 )
                 
-                # Extract the response
-                response = completion.choices[0].message.content
-                
-                # Clean up the response if needed
-                if "[Debug:" in response:
-                    response = response.split("[Debug:")[0].strip()
-                
-                # Update the chat history with the new messages
-                st.session_state.current_chat.append({"role": "user", "content": next_comment})
-                st.session_state.current_chat.append({"role": "assistant", "content": response})
+                with chat_container:
+                    with st.chat_message("user"):
+                        st.markdown(next_comment)
+                    with st.chat_message("assistant"):
+                        response = st.write_stream(
+                            chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices
+                        )
                 
-                # Rerun to update the display
-                st.rerun()
+                # Add the reply to the chat history; it is already rendered in place by the stream,
+                # so no rerun is needed to show it. The conversation has started, so the Begin
+                # button drawn earlier in this run goes away too
+                chat.append({"role": "assistant", "content": response})
+                if begin_slot is not None:
+                    begin_slot.empty()
             except Exception as e:
+                chat.pop()
                 st.error(f"Error generating response: {str(e)}")
+        else:
+            st.warning("Please enter your OpenAI API Key")
     
     # Generate Adversarial Strategy section
     if len(st.session_state.current_chat) > 2:  # Check if there's a conversation to analyze
         st.markdown("### Generate Adversarial Strategy")
         st.markdown("Create a counter strategy to defeat the master's advice")
         
-        # Extract the master's messages for analysis
-        master_advice = "\n".join([msg["content"] for msg in st.session_state.current_chat 
-                                  if msg["role"] == "assistant"])
+        # Extract the master's messages for analysis, rejoining only when the chat has changed
+        # (same length and same last message object means no new turns since the last rerun)
+        chat = st.session_state.current_chat
+        cache = st.session_state.get("_advice_cache")
+        if cache is None or cache[0] != len(chat) or cache[1] is not chat[-1]:
+            joined = "\n".join([msg["content"] for msg in chat if msg["role"] == "assistant"])
+            cache = st.session_state._advice_cache = (len(chat), chat[-1], joined)
+        master_advice = cache[2]
         
         counter_ruleset = st.selectbox("Ruleset", ["IBJJF", "Unified MMA"], 
                                       key="text_counter_rules")
@@ -559,10 +489,11 @@ elif st.session_state.app_function == "Master Talk":
                         ruleset=counter_ruleset,
                         position=""
                     )
+                    if counter_strategy.startswith("Error"):
+                        raise RuntimeError(counter_strategy)
                     
                     # Clean up the response if needed
-                    if "DEBUG INFO:" in counter_strategy and "RESPONSE:" in counter_strategy:
-                        counter_strategy = counter_strategy.split("RESPONSE:")[1].strip()
+                    counter_strategy = strip_debug(counter_strategy)
                     
                     # Display the counter strategy
                     st.markdown("### Counter Strategy")
@@ -572,32 +503,44 @@ elif st.session_state.app_function == "Master Talk":
                     st.error(f"An error occurred: {str(e)}")
 
 # Function: FLOW Chart Generator
-elif st.session_state.app_function == "FLOW Chart Generator":
+@_fragment
+def _render_flow_chart():
     st.title("FLOW Chart Generator")
     
-    # User inputs
-    position_variable = st.text_input("Starting Position", value=position_variable_default)
-    rules = st.selectbox("Rules", ["Unified MMA", "IBJJF"])
+    # User inputs, batched in a form so typing or changing the rules doesn't rerun the page
+    with st.form("flow_chart_form"):
+        position_variable = st.text_input("Starting Position", value=position_variable_default)
+        rules = st.selectbox("Rules", ["Unified MMA", "IBJJF"])
+        ideas = st.text_area("Ideas and Athlete Build", height=100, value=ideas_default)
+        generate_clicked = st.form_submit_button("Generate Flow Chart")
     isMMA = rules == "Unified MMA"
-    ideas = st.text_area("Ideas and Athlete Build", height=100, value=ideas_default)
     
     # Process attributes if an image has been uploaded
     attributes = ""
     if st.session_state.current_image and position_variable:
-        try:
-            attributes = get_attributes(st.session_state.current_image, position_variable)
-            
-            # Clean up the response if needed
-            if "DEBUG INFO:" in attributes and "RESPONSE:" in attributes:
-                attributes = attributes.split("RESPONSE:")[1].strip()
-            
+        # Only analyze again when the image or the position changed since the last rerun
+        attr_fp = (st.session_state.current_image_hash, position_variable)
+        cached_fp, cached_value = st.session_state.get("_attr_cache", (None, ""))
+        if cached_fp == attr_fp:
+            attributes = cached_value
             st.session_state.current_attributes = attributes
             st.success("Previous attributes included!")
-        except Exception as e:
-            st.warning(f"Could not analyze position attributes: {str(e)}")
+        else:
+            try:
+                attributes = cached_attributes(st.session_state.current_image_hash, position_variable,
+                                               image_data_url(st.session_state.current_image_b64))
+                
+                # Clean up the response if needed
+                attributes = strip_debug(attributes)
+                
+                st.session_state.current_attributes = attributes
+                st.session_state._attr_cache = (attr_fp, attributes)
+                st.success("Previous attributes included!")
+            except Exception as e:
+                st.warning(f"Could not analyze position attributes: {str(e)}")
     
-    # Generate flow chart button
-    if st.button("Generate Flow Chart"):
+    # Generate flow chart on form submit
+    if generate_clicked:
         if not position_variable:
             st.error("Please enter a starting position")
         else:
@@ -617,10 +560,11 @@ elif st.session_state.app_function == "FLOW Chart Generator":
                     )
                     
                     # Sanitize the flow chart to ensure it's valid mermaid syntax
-                    flow_chart = sanitize_mermaid(flow_chart)
+                    flow_chart = sanitized(flow_chart)
                     
                     # Update session state
                     st.session_state.current_flowchart = flow_chart
+                    st.session_state.current_flowchart_nodes = flowchart_tokens(flow_chart)
                 except Exception as e:
                     st.error(f"An error occurred: {str(e)}")
                     import traceback
@@ -644,8 +588,9 @@ elif st.session_state.app_function == "FLOW Chart Generator":
                 # Calculate width based on checkbox
                 chart_width = None if use_full_width else min(1200, chart_height * 1.5)
                 
-                # Render the chart with specified dimensions
-                render_mermaid(st.session_state.current_flowchart, height=chart_height, width=chart_width)
+                # Render the chart with specified dimensions; the page is built once per chart and reused on reruns.
+                # Charts are stored in session state already sanitized, so they aren't sanitized a second time here.
+                html(build_mermaid_html(st.session_state.current_flowchart, sanitize=False), height=chart_height, width=chart_width, scrolling=True)
                 
                 # Add download option in a smaller column
                 col1, col2 = st.columns([1, 2])
@@ -665,13 +610,7 @@ elif st.session_state.app_function == "FLOW Chart Generator":
                 
                 # Try a simplified version as fallback
                 st.markdown("### Fallback Chart")
-                fallback_chart = f"""
-                graph TD
-                    A["{position_variable}"] -->|"Move 1"| B["Position 1"]
-                    A -->|"Move 2"| C["Position 2"]
-                    B -->|"Action"| D["Submission 1"]
-                    C -->|"Action"| E["Submission 2"]
-                """
+                fallback_chart = _fallback_chart(position_variable)
                 try:
                     st.code(fallback_chart, language="mermaid")
                 except Exception as fallback_error:
@@ -690,30 +629,24 @@ elif st.session_state.app_function == "FLOW Chart Generator":
                 with col2:
                     # Show a hint about what can be entered
                     if st.session_state.current_flowchart:
-                        # Extract some node texts from the flowchart to show as examples
-                        nodes = []
-                        for line in st.session_state.current_flowchart.split("\n"):
-                            if "[" in line and "]" in line:
-                                start_idx = line.find("[")
-                                end_idx = line.find("]")
-                                node_text = line[start_idx+1:end_idx].strip()
-                                if node_text.startswith('"') and node_text.endswith('"'):
-                                    node_text = node_text[1:-1]
-                                if node_text not in nodes and node_text != position_variable:
-                                    nodes.append(node_text)
-                                    if len(nodes) >= 3:
-                                        break
-                        
-                        if nodes:
+                        # Reuse the hint while the chart object is unchanged (identity check, so the
+                        # chart isn't re-hashed or re-scanned on reruns that don't touch it)
+                        chart = st.session_state.current_flowchart
+                        cache = st.session_state.get("_node_examples")
+                        if not cache or cache[0] is not chart or cache[1] != position_variable:
+                            # Extract some node texts from the flowchart to show as examples
+                            nodes = extract_node_examples(chart, position_variable)
                             examples = ", ".join([f'"{node}"' for node in nodes[:3]])
-                            st.markdown(f"*Examples from current chart: {examples}*")
+                            examples_md = f"*Examples from current chart: {examples}*" if nodes else ""
+                            cache = st.session_state._node_examples = (chart, position_variable, examples_md)
+                        
+                        if cache[2]:
+                            st.markdown(cache[2])
                 
                 if flow_button and chosen_next:
-                    # Check if the move exists in the flowchart
-                    found = False
-                    if st.session_state.current_flowchart:
-                        # Simple check if the node or line exists in the flowchart
-                        found = chosen_next.lower() in st.session_state.current_flowchart.lower()
+                    # Check if the move exists in the flowchart: an exact match against the chart's
+                    # node ids and labels, so e.g. "arm" no longer matches "Armbar" or "farm"
+                    found = chosen_next.strip().lower() in st.session_state.current_flowchart_nodes
                     
                     if not found:
                         st.error("Osu! That move is not in the current flow chart. Try another move.")
@@ -730,10 +663,11 @@ elif st.session_state.app_function == "FLOW Chart Generator":
                                 )
                                 
                                 # Sanitize the flow chart to ensure it's valid mermaid syntax
-                                next_flowchart = sanitize_mermaid(next_flowchart)
+                                next_flowchart = sanitized(next_flowchart)
                                 
                                 # Update session state
                                 st.session_state.current_flowchart = next_flowchart
+                                st.session_state.current_flowchart_nodes = flowchart_tokens(next_flowchart)
                                 
                                 # Force a rerun to update the displayed chart
                                 st.rerun()
@@ -770,13 +704,14 @@ elif st.session_state.app_function == "FLOW Chart Generator":
                             position=counter_position,
                             measurables=counter_attributes
                         )
+                        if counter_plan.startswith("Error"):
+                            raise RuntimeError(counter_plan)
                         
                         # Clean up the response if needed
-                        if "DEBUG INFO:" in counter_plan and "RESPONSE:" in counter_plan:
-                            counter_plan = counter_plan.split("RESPONSE:")[1].strip()
+                        counter_plan = strip_debug(counter_plan)
                         
                         # Update session state with the counter plan
-                        st.session_state.counter_flowchart = counter_plan
+                        st.session_state.counter_flowchart = sanitized(counter_plan)
                         
                         # Force a rerun to update the displayed chart
                         st.rerun()
@@ -796,7 +731,7 @@ elif st.session_state.app_function == "FLOW Chart Generator":
                 # Display the counter flow chart
                 try:
                     # Render the counter chart with specified dimensions
-                    render_mermaid(st.session_state.counter_flowchart, height=800)
+                    html(build_mermaid_html(st.session_state.counter_flowchart, sanitize=False), height=800, scrolling=True)
                     
                     # Add download option
                     st.download_button(
@@ -808,10 +743,35 @@ elif st.session_state.app_function == "FLOW Chart Generator":
                 except Exception as e:
                     st.error(f"Error rendering counter flow chart: {str(e)}")
 
+# Timed fragments rerun on their own every half second; without fragment support they only
+# update on the next interaction
+_polling_fragment = ((lambda func: st.fragment(func, run_every=0.5)) if hasattr(st, "fragment")
+                     else (lambda func: func))
+
+# Status of the trim running on the worker thread. Once it finishes the job is cleared and the
+# app reruns once, so the trimmed video shows up and the Trim button is enabled again
+@_polling_fragment
+def _poll_trim_job(video_path):
+    trim_future, trim_source, trimmed_path = st.session_state._trim_job
+    if not trim_future.done():
+        st.info("Trimming video...")
+        return
+    
+    st.session_state._trim_job = None
+    # Ignore the result if a different video was uploaded while trimming
+    if trim_source == video_path:
+        if trim_future.result():
+            st.session_state.trimmed_video = trimmed_path
+            track_temp_file(trimmed_path)
+        else:
+            st.session_state._trim_failed = True
+    st.rerun()
+
 # Replace the existing Video Match Analysis section with this enhanced version
 
 # Function: Video Match Analysis
-elif st.session_state.app_function == "Video Match Analysis":
+@_fragment
+def _render_video_analysis():
     st.title("Video Match Analysis")
     
     # Video upload
@@ -820,23 +780,22 @@ elif st.session_state.app_function == "Video Match Analysis":
                                key="video_match_uploader")
     
     if uploaded_file is not None:
-        # Save the video temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-            tmp_file.write(uploaded_file.read())
-            video_path = tmp_file.name
+        # Save the video temporarily (only once per upload, not on every rerun)
+        video_path, video_hash = _persist_upload(uploaded_file, '.mp4')
         
         # Update session state
         st.session_state.current_video = video_path
         st.session_state.video_filename = uploaded_file.name
         
         # Get video duration for the slider
-        video_duration = get_video_duration(video_path)
+        video_duration = cached_video_duration(video_hash, video_path)
         if not video_duration:
             video_duration = 300.0  # Default to 5 minutes if duration can't be determined
         
-        # Generate thumbnail
+        # Generate thumbnail (once per upload; reruns reuse the file already on disk)
         thumbnail_path = video_path + ".jpg"
-        thumbnail_generated = generate_video_thumbnail(video_path, thumbnail_path)
+        thumbnail_generated = os.path.exists(thumbnail_path) or generate_video_thumbnail(video_path, thumbnail_path)
+        track_temp_file(thumbnail_path)
         
         # Display video details
         video_container = st.container()
@@ -867,62 +826,70 @@ elif st.session_state.app_function == "Video Match Analysis":
                 if 'trim_end' not in st.session_state:
                     st.session_state.trim_end = min(video_duration, 60.0)  # Default to first minute or full video
                 
-                # Format time as MM:SS for display
-                def format_time(seconds):
-                    minutes = int(seconds // 60)
-                    secs = int(seconds % 60)
-                    return f"{minutes:02d}:{secs:02d}"
-                
                 # Label with current time values
                 st.markdown(f"**Current selection:** {format_time(st.session_state.trim_start)} to {format_time(st.session_state.trim_end)}")
                 
-                # Create sliders for selecting start and end times
-                trim_start = st.slider(
-                    "Start Time (seconds)", 
-                    min_value=0.0, 
-                    max_value=video_duration,
-                    value=st.session_state.trim_start,
-                    step=1.0,
-                    format="%.1f s",
-                    key="trim_start_slider"
-                )
-                
-                trim_end = st.slider(
-                    "End Time (seconds)", 
-                    min_value=trim_start + 1.0,  # Ensure end time is after start time
-                    max_value=video_duration,
-                    value=max(trim_start + 1.0, st.session_state.trim_end),
-                    step=1.0,
-                    format="%.1f s",
-                    key="trim_end_slider"
-                )
+                # Trim button
+                if 'trimmed_video' not in st.session_state:
+                    st.session_state.trimmed_video = None
                 
-                # Update session state
-                st.session_state.trim_start = trim_start
-                st.session_state.trim_end = trim_end
+                # Sliders and the Trim button share a form so dragging doesn't rerun the page
+                with st.form("trim_form", clear_on_submit=False):
+                    # Create sliders for selecting start and end times
+                    trim_start = st.slider(
+                        "Start Time (seconds)", 
+                        min_value=0.0, 
+                        max_value=video_duration,
+                        value=st.session_state.trim_start,
+                        step=1.0,
+                        format="%.1f s",
+                        key="trim_start_slider"
+                    )
+                    
+                    trim_end = st.slider(
+                        "End Time (seconds)", 
+                        min_value=1.0,  # Checked against the start time on submit
+                        max_value=video_duration,
+                        value=max(1.0, st.session_state.trim_end),
+                        step=1.0,
+                        format="%.1f s",
+                        key="trim_end_slider"
+                    )
+                    
+                    accurate_trim = st.checkbox("Frame-accurate trim (slower, re-encodes the clip)",
+                                                key="accurate_trim")
+                    
+                    # A trim already running on the worker thread has to finish before another starts
+                    trim_submitted = st.form_submit_button("Trim Video",
+                                                           disabled=st.session_state.get("_trim_job") is not None)
                 
                 # Display selected duration
-                selected_duration = trim_end - trim_start
+                selected_duration = st.session_state.trim_end - st.session_state.trim_start
                 st.info(f"Selected duration: {format_time(selected_duration)}")
                 
-                # Trim button
-                if 'trimmed_video' not in st.session_state:
-                    st.session_state.trimmed_video = None
-                
-                if st.button("Trim Video"):
-                    with st.spinner("Trimming video..."):
+                if trim_submitted:
+                    if trim_end < trim_start + 1.0:
+                        st.error("The end time must be at least one second after the start time.")
+                    else:
+                        # Update session state
+                        st.session_state.trim_start = trim_start
+                        st.session_state.trim_end = trim_end
+                        
                         # Create output path
                         trimmed_path = f"{video_path}_trimmed.mp4"
                         
-                        # Call the trim function
-                        success = trim_video(video_path, trimmed_path, trim_start, trim_end)
-                        
-                        if success:
-                            st.session_state.trimmed_video = trimmed_path
-                            st.success("Video trimmed successfully!")
-                            st.rerun()  # Rerun to update UI
-                        else:
-                            st.error("Failed to trim video. Please check the logs for details.")
+                        # Run ffmpeg on a worker thread so the script thread isn't blocked while it trims
+                        trim_future = _background_pool().submit(
+                            trim_video, video_path, trimmed_path, trim_start, trim_end, accurate=accurate_trim
+                        )
+                        st.session_state._trim_job = (trim_future, video_path, trimmed_path)
+                
+                if st.session_state.pop("_trim_failed", False):
+                    st.error("Failed to trim video. Please check the logs for details.")
+                
+                # Poll the running trim in its own timed fragment, so the rest of the page isn't rerun
+                if st.session_state.get("_trim_job"):
+                    _poll_trim_job(video_path)
         
         # Display trimmed video if it exists
         if st.session_state.trimmed_video and os.path.exists(st.session_state.trimmed_video):
@@ -941,7 +908,7 @@ elif st.session_state.app_function == "Video Match Analysis":
         
         # Master selection for video analysis
         st.subheader("Analysis Configuration")
-        masters = load_masters()
+        masters, _ = load_masters()
         selected_master = st.selectbox("Select a Jiu-Jitsu Master for analysis", masters, index=0)
         
         # Additional options
@@ -976,31 +943,28 @@ elif st.session_state.app_function == "Video Match Analysis":
                 try:
                     # Initialize MovieAI
                     if 'OPENAI_API_KEY' in os.environ:
-                        movie_ai = MovieAI(os.environ.get("OPENAI_API_KEY"))
+                        movie_ai = get_movieai(os.environ["OPENAI_API_KEY"])
                         
                         # Extract a frame for the athlete attributes
                         base64Frames, nframes, fps = movie_ai.extract_frames(analysis_video, max_samples=1)
                         
+                        # Pending attribute job, estimated in the background while the analysis streams
+                        attributes_future = None
+                        
                         if base64Frames:
-                            # Save the frame as an image
-                            image_data = base64.b64decode(base64Frames[0])
-                            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as img_file:
-                                img_file.write(image_data)
-                                frame_path = img_file.name
-                            
-                            # Update session state
-                            st.session_state.current_image = frame_path
+                            # The frames are already base64-encoded; only the reference frame is decoded
+                            st.session_state.current_image = base64.b64decode(base64Frames[0])
+                            st.session_state.current_image_b64 = base64Frames[0]
+                            st.session_state.current_image_hash = image_digest(st.session_state.current_image)
+                            st.session_state._image_file_id = None
                             st.success("Extracted frame from video for reference")
                             
                             # Try to get attributes (catch exceptions to prevent stopping the analysis)
                             try:
-                                attributes = get_attributes(frame_path, player_variable)
-                                
-                                # Clean up the response if needed
-                                if "DEBUG INFO:" in attributes and "RESPONSE:" in attributes:
-                                    attributes = attributes.split("RESPONSE:")[1].strip()
-                                
-                                st.session_state.current_attributes = attributes
+                                # The frame is analyzed in the background while the master's analysis streams below
+                                attributes_future = _background_pool().submit(
+                                    movie_ai.analyze_frames, base64Frames, get_attributes_prompt(player_variable)
+                                )
                             except Exception as attr_e:
                                 st.warning(f"Could not analyze detailed attributes: {str(attr_e)}")
                                 st.session_state.current_attributes = "Experienced jiu-jitsu practitioner"
@@ -1017,13 +981,6 @@ elif st.session_state.app_function == "Video Match Analysis":
                         if context:
                             master_prompt +=f"Pay special attention to: {context}. "
                         
-                        # Generate the video analysis
-                        analysis = movie_ai.generate_video_description(
-                            analysis_video, 
-                            master_prompt,
-                            max_samples=max_frames
-                        )
-                        
                         # Display analysis results
                         st.markdown("## Master's Analysis")
                         
@@ -1036,14 +993,34 @@ elif st.session_state.app_function == "Video Match Analysis":
                         
                         st.markdown(f"*Analysis based on: {video_info}*")
                         
-                        # Format the analysis as coming from the selected master
-                        formatted_analysis = f"""
-                        ### Analysis by {selected_master}:
-                        
-                        {analysis}
-                        """
+                        # Stream the analysis as coming from the selected master, so the first
+                        # tokens show up while the rest of the response is still being generated
+                        st.markdown(f"### Analysis by {selected_master}:")
+                        st.write_stream(movie_ai.stream_video_description(
+                            analysis_video, 
+                            master_prompt,
+                            max_samples=max_frames
+                        ))
                         
-                        st.markdown(formatted_analysis)
+                        # Collect the athlete attributes, which were estimated alongside the analysis
+                        if attributes_future is not None:
+                            try:
+                                frame_attributes = attributes_future.result()
+                                
+                                # Clean up the responses if needed
+                                estimates = []
+                                for attributes in frame_attributes:
+                                    attributes = strip_debug(attributes)
+                                    if not attributes.startswith("Error"):
+                                        estimates.append(attributes)
+                                
+                                if not estimates:
+                                    raise RuntimeError(frame_attributes[0])
+                                
+                                st.session_state.current_attributes = "\n\n".join(estimates)
+                            except Exception as attr_e:
+                                st.warning(f"Could not analyze detailed attributes: {str(attr_e)}")
+                                st.session_state.current_attributes = "Experienced jiu-jitsu practitioner"
                                                         
                     else:
                         st.error("OpenAI API Key is required for video analysis")
@@ -1056,7 +1033,118 @@ elif st.session_state.app_function == "Video Match Analysis":
 
 # Updated Anime OODA Analysis section with larger waiting images that only appear after button press
 
-elif st.session_state.app_function == "Anime OODA Analysis":
+# Row background colors for the OODA strategy boxes (light blue, purple, orange, green, red)
+_ROW_COLORS = (
+    "rgba(230, 242, 255, 0.7)",
+    "rgba(248, 238, 255, 0.7)",
+    "rgba(255, 242, 230, 0.7)",
+    "rgba(230, 255, 242, 0.7)",
+    "rgba(255, 230, 230, 0.7)",
+)
+
+# Read and encode each static waiting image once per process instead of on every rerun
+@st.cache_resource(show_spinner=False)
+def _waiting_img_tag(filename, label):
+    try:
+        img_base64 = get_image_base64(filename)
+    except Exception:
+        img_base64 = None
+    if img_base64:
+        return f'<img src="data:image/png;base64,{img_base64}" alt="{label}">'
+    return f'<p style="text-align: center; font-size: 20px;">{label}</p>'
+
+# Number of most recent OODA rounds shown inline; older rounds collapse into an expander
+OODA_RECENT_ROWS = 3
+
+# Seconds to wait for an OODA counter before the request is retried once, so a slow
+# response can't hold up the battle indefinitely
+OODA_REQUEST_TIMEOUT = 20.0
+
+# Athlete description used for the villain (defender) side of the OODA battle
+VILLAIN_ATTRIBUTES = "Opponent with similar build, but specialty in defensive techniques"
+
+# One OODA counter: an adversarial plan against the opponent's last move, already formatted as
+# 3 bullet points by the same request. Runs on a worker thread, so it must not call st.*
+def _ooda_counter(last_move, ruleset, position, measurables):
+    # Generate a counter using adversarial_game_plan
+    counter = adversarial_game_plan(
+        last_move,
+        ruleset=ruleset,
+        position=position,
+        measurables=measurables,
+        bullets=True,
+        request_timeout=OODA_REQUEST_TIMEOUT
+    )
+    if counter.startswith("Error"):
+        raise RuntimeError(counter)
+    
+    # Clean up the response if needed
+    return strip_debug(counter)
+
+# Counters for both sides marshaled into one request, as (last move, athlete) pairs in side
+# order. Returns None when that fails, so the caller falls back to one request per side.
+def _ooda_counter_pair(requests, ruleset, position):
+    counters = adversarial_game_plan_batch(requests, ruleset=ruleset, position=position,
+                                           request_timeout=OODA_REQUEST_TIMEOUT)
+    if isinstance(counters, str):
+        return None
+    return counters
+
+# Counter button callback. Callbacks run before the script, so the run triggered by the click
+# already shows the waiting box and generates the counter, without an extra st.rerun()
+def _start_counter(side):
+    st.session_state[f"{side}_waiting"] = True
+
+# HTML for one side's strategy box in OODA round i: the strategy itself, the waiting image
+# while that side's next counter is being generated, or an empty box to keep rows aligned
+def _ooda_box_html(i, history, waiting, img_file, label, streamed=None):
+    # Background color for this row's boxes (cycles through 5 colors)
+    box_open = f"<div class='strategy-box' style='background-color: {_ROW_COLORS[i % len(_ROW_COLORS)]}'>"
+    
+    # Check if we have content for this row
+    if i < len(history):
+        # Format bullet points if needed
+        return f"{box_open}{_fmt(history[i]['content'])}</div>"
+    if i == len(history) and waiting:
+        # Show the counter streamed so far (not cached, it changes with every chunk)
+        if streamed:
+            return f"{box_open}{format_strategy_content(streamed)}</div>"
+        # Show waiting image if we're on the next row after existing content and this side is waiting
+        return f"{box_open}<div class='waiting-image'>{_waiting_img_tag(img_file, label)}</div></div>"
+    # Empty box for alignment
+    return f"{box_open}</div>"
+
+# HTML for OODA rounds as a single two-column grid (initiator | defender); `streamed` is
+# (side, text so far) for a counter that is still being streamed into its waiting box
+def _ooda_grid_html(rows, streamed=None):
+    left_text = streamed[1] if streamed and streamed[0] == "left" else None
+    right_text = streamed[1] if streamed and streamed[0] == "right" else None
+    cells = []
+    for i in rows:
+        cells.append(_ooda_box_html(i, st.session_state.left_column_history, st.session_state.left_waiting,
+                                    "hero_response.png", "Hero thinking...", left_text))
+        cells.append(_ooda_box_html(i, st.session_state.right_column_history, st.session_state.right_waiting,
+                                    "villain_response.png", "Villain thinking...", right_text))
+    return f"<div class='strategy-grid'>{''.join(cells)}</div>"
+
+# Render OODA rounds with one markdown element for all rows instead of a columns block plus two
+# markdown elements per row. The live row (where a counter will be streamed) gets its own
+# placeholder, which is returned so it can be redrawn in place.
+def _render_ooda_rows(rows, live_row=None):
+    if live_row not in rows:
+        st.markdown(_ooda_grid_html(rows), unsafe_allow_html=True)
+        return None
+    
+    if live_row > rows.start:
+        st.markdown(_ooda_grid_html(range(rows.start, live_row)), unsafe_allow_html=True)
+    placeholder = st.empty()
+    placeholder.markdown(_ooda_grid_html([live_row]), unsafe_allow_html=True)
+    if live_row + 1 < rows.stop:
+        st.markdown(_ooda_grid_html(range(live_row + 1, rows.stop)), unsafe_allow_html=True)
+    return placeholder
+
+@_fragment
+def _render_ooda():
     st.title("Anime OODA Analysis")
     
     # Initialize conversation history if not exists
@@ -1099,8 +1187,6 @@ elif st.session_state.app_function == "Anime OODA Analysis":
                         st.error("OpenAI API Key not found in environment variables")
                         st.stop()
                     
-                    genai = GenAI(api_key)
-                    
                     # Create the prompt for the initial strategy
                     match_type = "MMA" if isMMA else "IBJJF jiu-jitsu"
                     prompt = f"Generate a detailed jiu-jitsu strategy for an athlete with the following attributes: {st.session_state.current_attributes}. "
@@ -1109,11 +1195,12 @@ elif st.session_state.app_function == "Anime OODA Analysis":
                     prompt += f"Format the response as a clear, concise strategy with 3-4 key points. no more than 6 bullets"
                     
                     # Generate the strategy
-                    initial_strategy = genai.generate_text(prompt)
+                    initial_strategy = get_genai(api_key).generate_text(prompt)
+                    if initial_strategy.startswith("Error"):
+                        raise RuntimeError(initial_strategy)
                     
                     # Clean up the response if needed
-                    if "[Debug:" in initial_strategy:
-                        initial_strategy = initial_strategy.split("[Debug:")[0].strip()
+                    initial_strategy = strip_debug(initial_strategy)
                     
                     # Display the initial strategy
                     st.markdown("### Initial Strategy")
@@ -1160,123 +1247,120 @@ elif st.session_state.app_function == "Anime OODA Analysis":
         if st.session_state.right_waiting and len(st.session_state.right_column_history) == max_rows:
             max_rows += 1
         
-        # Loop through each row and create boxes
-        for i in range(max_rows):
-            # Create color class based on row index (cycle through 5 colors)
-            color_class = i % 5
-            
-            # Define background colors for different rows
-            bg_colors = [
-                "rgba(230, 242, 255, 0.7)",  # Light blue
-                "rgba(248, 238, 255, 0.7)",  # Light purple
-                "rgba(255, 242, 230, 0.7)",  # Light orange
-                "rgba(230, 255, 242, 0.7)",  # Light green
-                "rgba(255, 230, 230, 0.7)"   # Light red
-            ]
-            
-            # Create columns for this row
-            col1, col2 = st.columns(2)
-            
-            # Style for the boxes
-            box_style = f"""
-            <style>
-            .strategy-box-{i} {{
-                background-color: {bg_colors[color_class]};
-                border-radius: 8px;
-                padding: 15px;
-                margin-bottom: 15px;
-                box-shadow: 0 2px 6px rgba(0,0,0,0.1);
-                min-height: 200px;
-                display: flex;
-                flex-direction: column;
-                justify-content: center;
-            }}
-            .strategy-bullet {{
-                list-style-type: disc;
-                padding-left: 20px;
-            }}
-            .strategy-bullet li {{
-                margin-bottom: 8px;
-            }}
-            .waiting-image {{
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                height: 400px;
-            }}
-            .waiting-image img {{
-                max-width: 90%;
-                max-height: 400px;
-                object-fit: contain;
-            }}
-            </style>
-            """
+        # Show the latest rounds inline and collapse older ones, so long sessions don't
+        # push a growing wall of strategy boxes to the browser on every rerun
+        first_recent = max(0, max_rows - OODA_RECENT_ROWS)
+        if first_recent:
+            with st.expander(f"Earlier rounds ({first_recent})"):
+                _render_ooda_rows(range(first_recent))
+        
+        # When exactly one side is waiting its counter is streamed into its box as it is
+        # generated; both sides waiting at once are generated together instead
+        waiting_sides = [side for side in ("left", "right") if st.session_state[f"{side}_waiting"]]
+        stream_side = waiting_sides[0] if len(waiting_sides) == 1 else None
+        live_row = len(st.session_state[f"{stream_side}_column_history"]) if stream_side else None
+        live_placeholder = _render_ooda_rows(range(first_recent, max_rows), live_row)
+        
+        # Process the waiting states if needed. This runs before the counter buttons are drawn,
+        # so they already reflect the finished counters without another rerun.
+        # Per side: (history role, display name, opponent side, athlete description)
+        side_info = {
+            "left": ("initiator", "hero", "right", st.session_state.current_attributes),
+            "right": ("defender", "villain", "left", VILLAIN_ATTRIBUTES),
+        }
+        
+        if live_placeholder is not None:
+            role, _, opponent, athlete = side_info[stream_side]
+            try:
+                # Get the last move from the other column
+                opponent_history = st.session_state[f"{opponent}_column_history"]
+                if not opponent_history:
+                    raise IndexError("There is no move to counter yet")
+                last_move = opponent_history[-1]["content"]
+                
+                # Stream the counter into its box, redrawing the row every few chunks
+                counter = ""
+                chunks = stream_adversarial_game_plan(last_move, ruleset=ruleset, position=position_variable,
+                                                      measurables=athlete, bullets=True,
+                                                      request_timeout=OODA_REQUEST_TIMEOUT)
+                for n, piece in enumerate(chunks, 1):
+                    counter += piece
+                    if n % 8 == 0:
+                        live_placeholder.markdown(_ooda_grid_html([live_row], (stream_side, counter)),
+                                                  unsafe_allow_html=True)
+                counter = counter.strip()
+                
+                # Add to this side's column history
+                st.session_state[f"{stream_side}_column_history"].append({
+                    "role": role,
+                    "content": counter,
+                    "position": position_variable,
+                    "ruleset": ruleset,
+                    "athlete": athlete
+                })
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
             
-            # Left column (Initiator)
-            with col1:
-                st.markdown(box_style, unsafe_allow_html=True)
+            # Reset waiting state (also in case of error) and draw the finished row in place
+            st.session_state[f"{stream_side}_waiting"] = False
+            live_placeholder.markdown(_ooda_grid_html([live_row]), unsafe_allow_html=True)
+        
+        elif waiting_sides:
+            # Each side counters the other side's latest move, so when both are waiting their
+            # counters don't depend on each other. They are asked for in one batched request,
+            # falling back to concurrent per-side requests if that isn't possible.
+            names = " and ".join(side_info[side][1] for side in waiting_sides)
+            with st.spinner(f"Generating {names} counter-strategy..."):
+                # Get the last move from the other column
+                opponent_histories = [st.session_state[f"{side_info[side][2]}_column_history"]
+                                      for side in waiting_sides]
+                batched = None
+                if len(waiting_sides) == 2 and all(opponent_histories):
+                    batched = _ooda_counter_pair(
+                        [(history[-1]["content"], side_info[side][3])
+                         for side, history in zip(waiting_sides, opponent_histories)],
+                        ruleset, position_variable
+                    )
                 
-                # Check if we have content for this row
-                if i < len(st.session_state.left_column_history):
-                    # Format the content properly
-                    content = st.session_state.left_column_history[i]["content"]
-                    
-                    # Format bullet points if needed
-                    formatted_content = format_strategy_content(content)
-                    
-                    st.markdown(f"<div class='strategy-box-{i}'>{formatted_content}</div>", unsafe_allow_html=True)
-                # Show waiting image if we're on the next row after existing content and left_waiting is True
-                elif i == len(st.session_state.left_column_history) and st.session_state.left_waiting:
-                    # Display loading image
+                # Per side: the batched counter, or a pending future for its own request
+                pending = []
+                for n, (side, opponent_history) in enumerate(zip(waiting_sides, opponent_histories)):
+                    if batched:
+                        counter = batched[n]
+                    elif opponent_history:
+                        counter = _background_pool().submit(
+                            _ooda_counter, opponent_history[-1]["content"], ruleset, position_variable, side_info[side][3]
+                        )
+                    else:
+                        counter = None
+                    pending.append((side, counter))
+                
+                failed = False
+                for side, counter in pending:
+                    role, _, _, athlete = side_info[side]
                     try:
-                        hero_img_base64 = get_image_base64("hero_response.png")
-                        if hero_img_base64:
-                            hero_img_tag = f'<img src="data:image/png;base64,{hero_img_base64}" alt="Hero thinking...">'
-                        else:
-                            hero_img_tag = '<p style="text-align: center; font-size: 20px;">Hero thinking...</p>'
-                    except:
-                        hero_img_tag = '<p style="text-align: center; font-size: 20px;">Hero thinking...</p>'
+                        if counter is None:
+                            raise IndexError("There is no move to counter yet")
+                        formatted_counter = counter if isinstance(counter, str) else counter.result()
                         
-                    st.markdown(f"""
-                    <div class='strategy-box-{i}'>
-                        <div class='waiting-image'>{hero_img_tag}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    # Empty box for alignment
-                    st.markdown(f"<div class='strategy-box-{i}'></div>", unsafe_allow_html=True)
-            
-            # Right column (Defender)
-            with col2:
-                # Check if we have content for this row
-                if i < len(st.session_state.right_column_history):
-                    # Format the content properly
-                    content = st.session_state.right_column_history[i]["content"]
-                    
-                    # Format bullet points if needed
-                    formatted_content = format_strategy_content(content)
+                        # Add to this side's column history
+                        st.session_state[f"{side}_column_history"].append({
+                            "role": role,
+                            "content": formatted_counter,
+                            "position": position_variable,
+                            "ruleset": ruleset,
+                            "athlete": athlete
+                        })
+                    except Exception as e:
+                        st.error(f"An error occurred: {str(e)}")
+                        failed = True
                     
-                    st.markdown(f"<div class='strategy-box-{i}'>{formatted_content}</div>", unsafe_allow_html=True)
-                # Show waiting image if we're on the next row after existing content and right_waiting is True
-                elif i == len(st.session_state.right_column_history) and st.session_state.right_waiting:
-                    # Display loading image
-                    try:
-                        villain_img_base64 = get_image_base64("villain_response.png")
-                        if villain_img_base64:
-                            villain_img_tag = f'<img src="data:image/png;base64,{villain_img_base64}" alt="Villain thinking...">'
-                        else:
-                            villain_img_tag = '<p style="text-align: center; font-size: 20px;">Villain thinking...</p>'
-                    except:
-                        villain_img_tag = '<p style="text-align: center; font-size: 20px;">Villain thinking...</p>'
-                        
-                    st.markdown(f"""
-                    <div class='strategy-box-{i}'>
-                        <div class='waiting-image'>{villain_img_tag}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    # Empty box for alignment
-                    st.markdown(f"<div class='strategy-box-{i}'></div>", unsafe_allow_html=True)
+                    # Reset waiting state (also in case of error)
+                    st.session_state[f"{side}_waiting"] = False
+            
+            # Force a rerun to update the display (errors stay on screen instead)
+            if not failed:
+                st.rerun()
         
         # Add buttons for generating counter strategies
         button_col1, button_col2 = st.columns(2)
@@ -1285,132 +1369,15 @@ elif st.session_state.app_function == "Anime OODA Analysis":
         with button_col1:
             # Only show the button if there's a defender strategy to counter and not already waiting
             button_disabled = len(st.session_state.right_column_history) == 0 or st.session_state.left_waiting
-            if st.button("But I thought of that...", key="left_counter", disabled=button_disabled):
-                # Set waiting state immediately
-                st.session_state.left_waiting = True
-                st.rerun()  # Rerun to show the waiting image
+            st.button("But I thought of that...", key="left_counter", disabled=button_disabled,
+                      on_click=_start_counter, args=("left",))
         
         # Right column button (Defender)
         with button_col2:
             # Only enable if not already waiting
             button_disabled = st.session_state.right_waiting
-            if st.button("But I thought of that...", key="right_counter", disabled=button_disabled):
-                # Set waiting state immediately
-                st.session_state.right_waiting = True
-                st.rerun()  # Rerun to show the waiting image
-        
-        # Process the waiting states if needed
-        if st.session_state.left_waiting:
-            with st.spinner("Generating hero counter-strategy..."):
-                try:
-                    # Get the last move from the right column
-                    last_right_move = st.session_state.right_column_history[-1]["content"]
-                    
-                    # Generate a counter using adversarial_game_plan
-                    counter_plan = adversarial_game_plan(
-                        last_right_move,
-                        ruleset=ruleset,
-                        position=position_variable,
-                        measurables=st.session_state.current_attributes
-                    )
-                    
-                    # Clean up the response if needed
-                    if "DEBUG INFO:" in counter_plan and "RESPONSE:" in counter_plan:
-                        counter_plan = counter_plan.split("RESPONSE:")[1].strip()
-                    
-                    # Format as bullet points
-                    api_key = os.environ.get("OPENAI_API_KEY", "")
-                    genai = GenAI(api_key)
-                    
-                    format_prompt = f"""
-                    Format the following counter-strategy into 3 clear bullet points (using • bullet format).
-                    Keep each bullet point concise and action-oriented.
-                    Do not use asterisks (*) or dashes (-).
-                    
-                    Counter strategy to format:
-                    {counter_plan}
-                    """
-                    
-                    formatted_counter = genai.generate_text(format_prompt)
-                    
-                    if "[Debug:" in formatted_counter:
-                        formatted_counter = formatted_counter.split("[Debug:")[0].strip()
-                    
-                    # Add to left column history
-                    st.session_state.left_column_history.append({
-                        "role": "initiator",
-                        "content": formatted_counter,
-                        "position": position_variable,
-                        "ruleset": ruleset,
-                        "athlete": st.session_state.current_attributes
-                    })
-                    
-                    # Reset waiting state
-                    st.session_state.left_waiting = False
-                    
-                    # Force a rerun to update the display
-                    st.rerun()
-                    
-                except Exception as e:
-                    st.error(f"An error occurred: {str(e)}")
-                    # Reset waiting state in case of error
-                    st.session_state.left_waiting = False
-        
-        if st.session_state.right_waiting:
-            with st.spinner("Generating villain counter-strategy..."):
-                try:
-                    # Get the last move from the left column
-                    last_left_move = st.session_state.left_column_history[-1]["content"]
-                    
-                    # Generate a counter using adversarial_game_plan
-                    counter_plan = adversarial_game_plan(
-                        last_left_move,
-                        ruleset=ruleset,
-                        position=position_variable,
-                        measurables="Opponent with similar build, but specialty in defensive techniques"
-                    )
-                    
-                    # Clean up the response if needed
-                    if "DEBUG INFO:" in counter_plan and "RESPONSE:" in counter_plan:
-                        counter_plan = counter_plan.split("RESPONSE:")[1].strip()
-                    
-                    # Format as bullet points
-                    api_key = os.environ.get("OPENAI_API_KEY", "")
-                    genai = GenAI(api_key)
-                    
-                    format_prompt = f"""
-                    Format the following counter-strategy into 3 clear bullet points (using • bullet format).
-                    Keep each bullet point concise and action-oriented.
-                    Do not use asterisks (*) or dashes (-).
-                    
-                    Counter strategy to format:
-                    {counter_plan}
-                    """
-                    
-                    formatted_counter = genai.generate_text(format_prompt)
-                    
-                    if "[Debug:" in formatted_counter:
-                        formatted_counter = formatted_counter.split("[Debug:")[0].strip()
-                    
-                    # Add to right column history
-                    st.session_state.right_column_history.append({
-                        "role": "defender",
-                        "content": formatted_counter,
-                        "position": position_variable,
-                        "ruleset": ruleset,
-                        "athlete": "Opponent with similar build, but specialty in defensive techniques"
-                    })
-                    
-                    # Reset waiting state
-                    st.session_state.right_waiting = False
-                    
-                    # Force a rerun to update the display
-                    st.rerun()
-                    
-                except Exception as e:
-                    st.error(f"An error occurred: {str(e)}")
-                    # Reset waiting state in case of error
-                    st.session_state.right_waiting = False
+            st.button("But I thought of that...", key="right_counter", disabled=button_disabled,
+                      on_click=_start_counter, args=("right",))
         
         # Add a reset button at the bottom
         if st.button("Reset Battle", key="reset_battle"):
@@ -1419,4 +1386,14 @@ elif st.session_state.app_function == "Anime OODA Analysis":
             st.session_state.left_waiting = False
             st.session_state.right_waiting = False
             st.rerun()
-# End of Anime OODA Analysis section
\ No newline at end of file
+# End of Anime OODA Analysis section
+
+# Render only the selected page
+_PAGES = {
+    "Position Image Recommendations": _render_positions,
+    "Master Talk": _render_master_talk,
+    "FLOW Chart Generator": _render_flow_chart,
+    "Video Match Analysis": _render_video_analysis,
+    "Anime OODA Analysis": _render_ooda,
+}
+_PAGES[st.session_state.app_function]()
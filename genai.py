@@ -1,11 +1,28 @@
 import os
-import openai
 import base64
-import requests
+import functools
 import time
 import traceback
 import json
 
+@functools.lru_cache(maxsize=None)
+def _openai():
+    """
+    Imports the OpenAI SDK on first use. It is by far the slowest import in the app, so
+    pages that never call the API don't have to wait for it.
+    """
+    import openai
+    return openai
+
+@functools.lru_cache(maxsize=None)
+def _http2_available():
+    """
+    HTTP/2 needs the optional h2 package (pip install "httpx[http2]"); without it the
+    shared client stays on HTTP/1.1 keep-alive.
+    """
+    import importlib.util
+    return importlib.util.find_spec("h2") is not None
+
 class GenAI:
     """
     A simplified version of the GenAI class without dependencies on cv2 and other libraries.
@@ -19,13 +36,32 @@ class GenAI:
         self.openai_api_key = openai_api_key
         self.client = None
         try:
-            self.client = openai.Client(api_key=openai_api_key)
+            self.client = self._new_client()
             print("OpenAI client initialized successfully")
         except Exception as e:
             print(f"Error initializing OpenAI client: {str(e)}")
             traceback.print_exc()
 
-    def generate_text(self, prompt, instructions='You are a helpful AI named Jarvis', model="gpt-4o-mini", output_type='text', temperature=1):
+    def _new_client(self):
+        """
+        Builds the OpenAI client with one long-lived HTTP connection pool, multiplexed over
+        HTTP/2 when available, so consecutive calls reuse a warm TLS connection.
+        """
+        openai = _openai()
+        http_client = openai.DefaultHttpxClient(http2=_http2_available())
+        return openai.Client(api_key=self.openai_api_key, http_client=http_client)
+
+    def _client_for(self, request_timeout=None):
+        """
+        The shared client, or a view of it with a per-request timeout (in seconds). A timed out
+        request is retried once by the SDK with its backoff, which caps the tail latency of a
+        slow response instead of letting it block the caller indefinitely.
+        """
+        if request_timeout is None:
+            return self.client
+        return self.client.with_options(timeout=request_timeout, max_retries=1)
+
+    def generate_text(self, prompt, instructions='You are a helpful AI named Jarvis', model="gpt-4o-mini", output_type='text', temperature=1, request_timeout=None):
         """
         Generates a text completion using the OpenAI API.
         """
@@ -34,13 +70,13 @@ class GenAI:
         
         try:
             if not self.client:
-                self.client = openai.Client(api_key=self.openai_api_key)
+                self.client = self._new_client()
                 debug_info += "Created new OpenAI client\n"
             
             debug_info += "Calling OpenAI API...\n"
             print("Calling OpenAI API for text generation...")
             
-            completion = self.client.chat.completions.create(
+            completion = self._client_for(request_timeout).chat.completions.create(
                 model=model,
                 temperature=temperature,
                 response_format={"type": output_type},
@@ -64,6 +100,35 @@ class GenAI:
             print(err_msg)
             return err_msg
 
+    def stream_text(self, prompt, instructions='You are a helpful AI named Jarvis', model="gpt-4o-mini", temperature=1, request_timeout=None):
+        """
+        Streaming variant of generate_text that yields the completion as it is generated.
+        Unlike generate_text, errors are printed and re-raised, since a partially streamed
+        response can't be replaced by an error message.
+        """
+        try:
+            if not self.client:
+                self.client = self._new_client()
+            
+            print("Calling OpenAI API for streamed text generation...")
+            stream = self._client_for(request_timeout).chat.completions.create(
+                model=model,
+                temperature=temperature,
+                messages=[
+                    {"role": "system", "content": instructions},
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True
+            )
+            
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        
+        except Exception as e:
+            print(f"Error streaming text: {str(e)}\n{traceback.format_exc()}")
+            raise
+
     def generate_chat_response(self, chat_history, user_message, instructions, model="gpt-4o-mini", output_type='text'):
         """
         Generates a chatbot-like response based on the conversation history.
@@ -73,7 +138,7 @@ class GenAI:
         
         try:
             if not self.client:
-                self.client = openai.Client(api_key=self.openai_api_key)
+                self.client = self._new_client()
                 debug_info += "Created new OpenAI client\n"
             
             # Add the latest user message to the chat history
@@ -110,8 +175,14 @@ class GenAI:
 
     def encode_image(self, image_path):
         """
-        Encodes an image file into a base64 string.
+        Encodes an image file (or raw image bytes) into a base64 string.
+        A "data:image/...;base64," URL is treated as already encoded and returned as-is.
         """
+        if isinstance(image_path, (bytes, bytearray)):
+            return base64.b64encode(image_path).decode('utf-8')
+        if image_path.startswith("data:image/"):
+            return image_path.partition("base64,")[2]
+        
         debug_info = f"encode_image called with path: {image_path}\n"
         
         try:
@@ -130,30 +201,31 @@ class GenAI:
     def generate_image_description(self, image_paths, instructions, model='gpt-4o-mini'):
         """
         Generates a description for one or more images using OpenAI's vision capabilities.
+        Each image may be a file path, raw image bytes or a pre-encoded base64 data URL.
         """
         debug_info = f"generate_image_description called with instructions: {instructions[:50]}...\n"
         
         try:
-            if isinstance(image_paths, str):
+            if isinstance(image_paths, (str, bytes, bytearray)):
                 image_paths = [image_paths]
                 
             debug_info += f"Number of images: {len(image_paths)}\n"
             print(f"Processing {len(image_paths)} images")
             
             if not self.client:
-                self.client = openai.Client(api_key=self.openai_api_key)
+                self.client = self._new_client()
                 debug_info += "Created new OpenAI client\n"
             
             image_urls = []
             for idx, image_path in enumerate(image_paths):
-                print(f"Encoding image {idx+1}: {image_path}")
+                print(f"Encoding image {idx+1}")
                 encoded_image = self.encode_image(image_path)
                 if encoded_image:
                     image_url = f"data:image/jpeg;base64,{encoded_image}"
                     image_urls.append(image_url)
                     debug_info += f"Image {idx+1} encoded successfully\n"
                 else:
-                    err_msg = f"Error encoding image {idx+1}: {image_path}"
+                    err_msg = f"Error encoding image {idx+1}"
                     debug_info += f"{err_msg}\n"
                     print(err_msg)
                     return f"Error: {err_msg}\n{debug_info}"
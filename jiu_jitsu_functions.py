@@ -1,5 +1,7 @@
 import os
 import sys
+import functools
+import re
 import traceback
 
 # Add current directory to path to help with imports
@@ -29,14 +31,60 @@ except ImportError as e:
         def generate_video_description(self, video, prompt):
             return f"Video analysis from {video} with prompt: {prompt}"
 
+# Optional RE2 engine (google-re2) for the patterns run on model output. It matches in linear
+# time, so a pathological response can't cause catastrophic backtracking; re is the fallback.
+try:
+    import re2 as mermaid_re
+except ImportError:
+    mermaid_re = re
+
+@functools.lru_cache(maxsize=4)
+def get_genai(api_key):
+    """
+    Returns a shared GenAI instance per API key so every helper (and the app itself) reuses
+    one OpenAI client and its keep-alive connection pool instead of building a new one per call.
+    """
+    return GenAI(api_key)
+
+def strip_debug(text):
+    """
+    Removes the debug scaffolding from a GenAI or helper response: the leading
+    "DEBUG INFO: ... RESPONSE:" (or "MERMAID:") wrapper and the trailing "[Debug: ...]" footer.
+    The wrapper always leads the string, so plain responses skip straight to the footer check.
+    """
+    if text.startswith("DEBUG INFO:"):
+        for marker in ("RESPONSE:", "MERMAID:"):
+            _, sep, response = text.partition(marker)
+            if sep:
+                text = response
+                break
+    return text.partition("[Debug:")[0].strip()
+
+def _is_image_path(image):
+    """
+    True when an image argument is a file path rather than raw bytes or a base64 data URL.
+    """
+    return isinstance(image, str) and not image.startswith("data:image/")
+
+def _describe_image(image):
+    """
+    Short description of an image argument (file path, raw bytes or data URL) for debug output.
+    """
+    if isinstance(image, (bytes, bytearray)):
+        return f"<{len(image)} bytes in memory>"
+    if not _is_image_path(image):
+        return f"<base64 data URL, {len(image)} chars>"
+    return image
+
 def generate_grappling_plan(image, player_variable, isMMA=True, keywords=""):
     """
     Analyzes a still frame from a grappling match and generates recommended next moves.
     
     Parameters:
     -----------
-    image : str
-        Path to the image file showing a grappling position
+    image : str or bytes
+        Path to the image file showing a grappling position, the raw image bytes,
+        or a pre-encoded "data:image/jpeg;base64,..." URL
     player_variable : str
         Which player to analyze ('top', 'bottom', or 'both')
     isMMA : bool, optional
@@ -50,7 +98,7 @@ def generate_grappling_plan(image, player_variable, isMMA=True, keywords=""):
         Recommendations for the next immediate steps
     """
     # Debug information
-    debug_info = f"Function called with:\nimage: {image}\nplayer_variable: {player_variable}\nisMMA: {isMMA}\nkeywords: {keywords}\n"
+    debug_info = f"Function called with:\nimage: {_describe_image(image)}\nplayer_variable: {player_variable}\nisMMA: {isMMA}\nkeywords: {keywords}\n"
     debug_info += f"API Key set in environment: {'Yes' if os.environ.get('OPENAI_API_KEY') else 'No'}\n"
     
     try:
@@ -60,7 +108,7 @@ def generate_grappling_plan(image, player_variable, isMMA=True, keywords=""):
             return "Error: OpenAI API Key not found in environment variables"
         
         debug_info += f"Creating GenAI instance with API key: {api_key[:5]}...\n"
-        genai = GenAI(api_key)
+        genai = get_genai(api_key)
         
         # Create the prompt for image analysis
         match_type = "MMA" if isMMA else "Jiu-jitsu"
@@ -76,10 +124,10 @@ def generate_grappling_plan(image, player_variable, isMMA=True, keywords=""):
         debug_info += f"Created prompt: {prompt[:100]}...\n"
         
         # Check if image file exists
-        if not os.path.exists(image):
+        if _is_image_path(image) and not os.path.exists(image):
             return f"Error: Image file not found at {image}"
         
-        debug_info += f"Image file exists: {image}\n"
+        debug_info += f"Image available: {_describe_image(image)}\n"
         
         # Generate image description with recommendations
         debug_info += "Calling generate_image_description...\n"
@@ -103,7 +151,7 @@ def analyse_grappling_match(video, player_variable, isMMA=True, keywords="", sta
         if not api_key:
             return "Error: OpenAI API Key not found in environment variables"
         
-        genai = GenAI(api_key)
+        genai = get_genai(api_key)
     except Exception as e:
         return f"Error initializing GenAI: {str(e)}"
     
@@ -153,7 +201,7 @@ def generate_flow_chart_with_start(measurables, starting_position, isMMA=True, f
         if not api_key:
             return "Error: OpenAI API Key not found in environment variables"
         
-        genai = GenAI(api_key)
+        genai = get_genai(api_key)
         
         # Create the prompt for flow chart generation
         match_type = "MMA" if isMMA else "IBJJF jiu-jitsu"
@@ -222,8 +270,7 @@ graph LR
         mermaid_object = genai.generate_text(prompt)
         
         # Clean up the response
-        if "[Debug:" in mermaid_object:
-            mermaid_object = mermaid_object.split("[Debug:")[0].strip()
+        mermaid_object = strip_debug(mermaid_object)
         
         # Extract just the code if wrapped in backticks
         if "```" in mermaid_object:
@@ -266,7 +313,7 @@ def generate_flow_chart(measurables, position_variable="both", isMMA=True, favor
             return "Error: OpenAI API Key not found in environment variables"
         
         debug_info += f"Creating GenAI instance with API key: {api_key[:5]}...\n"
-        genai = GenAI(api_key)
+        genai = get_genai(api_key)
         
         # Create the prompt for flow chart generation
         match_type = "MMA" if isMMA else "Jiu-jitsu"
@@ -322,7 +369,7 @@ def gracie_talk(gracie_name, chat_history, user_message):
         if not api_key:
             return "Error: OpenAI API Key not found in environment variables"
         
-        genai = GenAI(api_key)
+        genai = get_genai(api_key)
     except Exception as e:
         return f"Error initializing GenAI: {str(e)}"
     
@@ -338,52 +385,58 @@ def gracie_talk(gracie_name, chat_history, user_message):
     except Exception as e:
         return f"Error generating chat response: {str(e)}"
 
+# Diagram declarations a sanitized chart may start with
+_MERMAID_PREFIXES = ("graph ", "flowchart ", "sequenceDiagram", "classDiagram", "stateDiagram", "gantt", "pie")
+
+# Simple chart used when a response contains no mermaid syntax at all
+_DEFAULT_MERMAID_CHART = """graph TD
+    A["Starting Position"] --> B["Position 1"]
+    A --> C["Position 2"]
+    B --> D["Submission 1"]
+    C --> E["Submission 2"]"""
+
+# Node text in square brackets and arrow labels between pipes, each confined to one line
+_NODE_TEXT_RE = mermaid_re.compile(r'(\[)([^\]\n]*)(\])')
+_ARROW_LABEL_RE = mermaid_re.compile(r'(-->\|)([^|\n]*)(\|)')
+
+def _quote_label(match):
+    """
+    re.sub callback that wraps a node or arrow label in double quotes unless it already is.
+    """
+    opener, label, closer = match.groups()
+    if label.startswith('"') and label.endswith('"'):
+        return match.group(0)
+    return f'{opener}"{label}"{closer}'
+
 # Function to sanitize and prepare mermaid chart content
 def sanitize_mermaid(flow_chart):
     """
     Sanitizes a mermaid chart string to ensure it only contains valid mermaid syntax.
     """
-    # Remove any debug info sections if present
-    if "DEBUG INFO:" in flow_chart and "MERMAID:" in flow_chart:
-        parts = flow_chart.split("MERMAID:")
-        if len(parts) > 1:
-            flow_chart = parts[1].strip()
-    
-    # Remove any debug info at the end (common with API responses)
-    if "[Debug:" in flow_chart:
-        flow_chart = flow_chart.split("[Debug:")[0].strip()
+    # Remove any debug info sections, including the one at the end common with API responses
+    # (this also strips the surrounding whitespace)
+    flow_chart = strip_debug(flow_chart)
     
     # Remove markdown backticks if present
-    if "```mermaid" in flow_chart:
-        flow_chart = flow_chart.replace("```mermaid", "").strip()
     if "```" in flow_chart:
-        flow_chart = flow_chart.replace("```", "").strip()
+        flow_chart = flow_chart.replace("```mermaid", "").replace("```", "").strip()
     
     # Ensure the chart starts with a valid mermaid syntax
-    if not any(flow_chart.strip().startswith(x) for x in ["graph ", "flowchart ", "sequenceDiagram", "classDiagram", "stateDiagram", "gantt", "pie"]):
+    if not flow_chart.startswith(_MERMAID_PREFIXES):
         # Try to extract just the graph portion if we can find it
-        if "graph " in flow_chart:
-            start_idx = flow_chart.find("graph ")
-            flow_chart = flow_chart[start_idx:].strip()
-        elif "flowchart " in flow_chart:
+        start_idx = flow_chart.find("graph ")
+        if start_idx == -1:
             start_idx = flow_chart.find("flowchart ")
-            flow_chart = flow_chart[start_idx:].strip()
-        else:
-            # If no valid mermaid syntax is found, provide a simple default
-            flow_chart = """
-            graph TD
-                A["Starting Position"] --> B["Position 1"]
-                A --> C["Position 2"]
-                B --> D["Submission 1"]
-                C --> E["Submission 2"]
-            """
+        
+        # If no valid mermaid syntax is found, provide a simple default
+        flow_chart = flow_chart[start_idx:].strip() if start_idx != -1 else _DEFAULT_MERMAID_CHART
     
     # Process each line of the flow chart
-    lines = flow_chart.strip().split('\n')
+    lines = flow_chart.split('\n')
     clean_lines = []
     
     # First line should be the graph declaration
-    if lines and (lines[0].strip().startswith('graph ') or lines[0].strip().startswith('flowchart ')):
+    if lines[0].startswith(('graph ', 'flowchart ')):
         clean_lines.append(lines[0].strip())
     else:
         # Add a default graph declaration if none exists
@@ -398,64 +451,25 @@ def sanitize_mermaid(flow_chart):
             continue
         
         # Skip multiple graph declarations
-        if line.startswith('graph ') or line.startswith('flowchart '):
+        if line.startswith(('graph ', 'flowchart ')):
             continue
         
         # Add proper indentation
         if not line.startswith('    '):
             line = '    ' + line
         
-        # Quote node texts
-        new_line = line
-        
-        # Fix node labels - find text inside square brackets and add quotes
-        bracket_start = 0
-        while '[' in new_line[bracket_start:]:
-            bracket_start = new_line.find('[', bracket_start)
-            if bracket_start == -1:
-                break
-                
-            bracket_end = new_line.find(']', bracket_start)
-            if bracket_end == -1:
-                break
-                
-            # Extract and quote the label
-            label = new_line[bracket_start+1:bracket_end]
-            if not (label.startswith('"') and label.endswith('"')):
-                quoted_label = f'"{label}"'
-                new_line = new_line[:bracket_start+1] + quoted_label + new_line[bracket_end:]
-                # Update bracket_end to account for added quotes
-                bracket_end += 2
-                
-            bracket_start = bracket_end + 1
-        
-        # Fix arrow labels - find text inside arrow pipes and add quotes
-        arrow_start = 0
-        while '-->|' in new_line[arrow_start:]:
-            arrow_start = new_line.find('-->|', arrow_start)
-            if arrow_start == -1:
-                break
-                
-            pipe_start = arrow_start + 4  # Skip past '-->|'
-            pipe_end = new_line.find('|', pipe_start)
-            if pipe_end == -1:
-                break
-                
-            # Extract and quote the label
-            label = new_line[pipe_start:pipe_end]
-            if not (label.startswith('"') and label.endswith('"')):
-                quoted_label = f'"{label}"'
-                new_line = new_line[:pipe_start] + quoted_label + new_line[pipe_end:]
-                # Update pipe_end to account for added quotes
-                pipe_end += 2
-                
-            arrow_start = pipe_end + 1
-        
-        clean_lines.append(new_line)
+        clean_lines.append(line)
     
     # Join the lines back together
     fixed_chart = '\n'.join(clean_lines)
     
+    # Quote node texts and arrow labels in one pass over the chart each, skipping
+    # the regex entirely when the chart has no such labels
+    if '[' in fixed_chart:
+        fixed_chart = _NODE_TEXT_RE.sub(_quote_label, fixed_chart)
+    if '-->|' in fixed_chart:
+        fixed_chart = _ARROW_LABEL_RE.sub(_quote_label, fixed_chart)
+    
     # Fix any other obvious formatting issues
     fixed_chart = fixed_chart.replace("[ ", "[")
     fixed_chart = fixed_chart.replace(" ]", "]")
@@ -1081,20 +1095,93 @@ def display_graph(flow_chart):
     
     return html
 
+def _render_mermaid_svg(chart):
+    """
+    Renders a sanitized mermaid chart to an SVG string with the mermaid-cli (mmdc)
+    command line tool, when it is installed. mmdc starts a headless Chromium and runs
+    synchronously on the calling (script) thread, so each new chart can block for up to
+    the 30 second timeout; repeated charts are served by build_mermaid_html's cache.
+    
+    Parameters:
+    -----------
+    chart : str
+        The sanitized chart string
+    
+    Returns:
+    --------
+    str or None
+        The SVG markup, or None when mmdc is missing or can't render the chart
+    """
+    import shutil
+    mmdc = shutil.which("mmdc")
+    if mmdc is None:
+        return None
+    
+    import subprocess
+    import tempfile
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_path = os.path.join(tmp_dir, "chart.mmd")
+            svg_path = os.path.join(tmp_dir, "chart.svg")
+            with open(chart_path, "w", encoding="utf-8") as chart_file:
+                chart_file.write(chart)
+            subprocess.run([mmdc, "-i", chart_path, "-o", svg_path, "--quiet"],
+                           check=True, capture_output=True, timeout=30)
+            with open(svg_path, "r", encoding="utf-8") as svg_file:
+                return svg_file.read()
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"mmdc render failed, falling back to mermaid.js: {e}")
+        return None
+
 # Replace the render_mermaid function in jiu_jitsu_functions.py with this:
-def render_mermaid(chart, height=800, width=None):
+# Cached per chart, since the SVG render and sanitize pass depend only on the chart text
+@functools.lru_cache(maxsize=32)
+def build_mermaid_html(chart, sanitize=True):
     """
-    Renders a mermaid chart in Streamlit using HTML component.
+    Builds the standalone HTML page that renders a mermaid chart in the browser.
     
     Parameters:
     -----------
     chart : str
         The chart string to render
-    """
-    from streamlit.components.v1 import html
+    sanitize : bool, optional
+        Run sanitize_mermaid on the chart first; pass False for charts that were
+        already sanitized when they were generated
     
+    Returns:
+    --------
+    str
+        HTML document loading mermaid.js with the sanitized chart embedded
+    """
     # Ensure the chart is properly sanitized
-    chart = sanitize_mermaid(chart)
+    if sanitize:
+        chart = sanitize_mermaid(chart)
+    
+    # Pre-render to SVG on the server when mmdc is installed, so the browser
+    # doesn't have to download mermaid.js and lay the chart out itself
+    svg = _render_mermaid_svg(chart)
+    if svg:
+        return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body {{
+                margin: 0;
+                padding: 5px;
+                overflow: auto;
+            }}
+            .mermaid-container {{
+                display: flex;
+                justify-content: center;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="mermaid-container">{svg}</div>
+    </body>
+    </html>
+    """
     
     # Simple and reliable HTML for Streamlit
     html_content = f"""
@@ -1152,9 +1239,21 @@ def render_mermaid(chart, height=800, width=None):
     </body>
     </html>
     """
+    return html_content
+
+def render_mermaid(chart, height=800, width=None):
+    """
+    Renders a mermaid chart in Streamlit using HTML component.
+    
+    Parameters:
+    -----------
+    chart : str
+        The chart string to render
+    """
+    from streamlit.components.v1 import html
     
     # Render the HTML, with sufficient height to display the chart
-    html(html_content, height=height, width=width, scrolling=True)
+    html(build_mermaid_html(chart), height=height, width=width, scrolling=True)
 
 def next_move(flow_chart, move_text, measurables, isMMA=True, favorite_ideas=""):
     """
@@ -1179,15 +1278,8 @@ def next_move(flow_chart, move_text, measurables, isMMA=True, favorite_ideas="")
     str
         A new detailed mermaid flow chart focused on the selected move
     """
-    # Remove DEBUG INFO section if present
-    if "DEBUG INFO:" in flow_chart and "MERMAID:" in flow_chart:
-        parts = flow_chart.split("MERMAID:")
-        if len(parts) > 1:
-            flow_chart = parts[1].strip()
-    
-    # Remove any debug info at the end
-    if "[Debug:" in flow_chart:
-        flow_chart = flow_chart.split("[Debug:")[0].strip()
+    # Remove the DEBUG INFO section and any debug info at the end
+    flow_chart = strip_debug(flow_chart)
     
     # Parse the flow chart to find the next node
     lines = flow_chart.strip().split('\n')
@@ -1230,9 +1322,9 @@ def next_move(flow_chart, move_text, measurables, isMMA=True, favorite_ideas="")
                 # Check if this matches what user entered
                 if move_text.lower() in arrow_text.lower():
                     # Find the target node
-                    parts = line.split("|", 1)
-                    if len(parts) > 1:
-                        target_part = parts[1].split("|")[1] if "|" in parts[1] else parts[1]
+                    _, sep, rest = line.partition("|")
+                    if sep:
+                        target_part = rest.split("|", 2)[1] if "|" in rest else rest
                         
                         # Extract the node ID and text
                         if "[" in target_part and "]" in target_part:
@@ -1255,7 +1347,7 @@ def next_move(flow_chart, move_text, measurables, isMMA=True, favorite_ideas="")
             if line.strip().startswith(node_id) and "-->|" in line:
                 if "[" in line and "]" in line:
                     # Extract the target node text
-                    parts = line.split("-->|", 1)[1].split("|", 1)[1]
+                    parts = line.partition("-->|")[2].partition("|")[2]
                     start_idx = parts.find("[")
                     end_idx = parts.find("]")
                     if start_idx >= 0 and end_idx >= 0:
@@ -1266,10 +1358,10 @@ def next_move(flow_chart, move_text, measurables, isMMA=True, favorite_ideas="")
                         context_nodes.append(target_text)
             
             # Check for inbound connections to our node
-            elif "-->|" in line and node_id in line.split("-->|", 1)[1]:
+            elif "-->|" in line and node_id in line.partition("-->|")[2]:
                 if "[" in line and "]" in line:
                     # Extract the source node text
-                    parts = line.split("-->|", 1)[0]
+                    parts = line.partition("-->|")[0]
                     start_idx = parts.find("[")
                     end_idx = parts.find("]")
                     if start_idx >= 0 and end_idx >= 0:
@@ -1297,12 +1389,35 @@ def next_move(flow_chart, move_text, measurables, isMMA=True, favorite_ideas="")
     # Call the enhanced generate_flow_chart_with_start function
     return generate_flow_chart_with_start(measurables, new_position, isMMA, enhanced_ideas)
 
+def get_attributes_prompt(player_variable):
+    """
+    Builds the vision prompt used to estimate an athlete's physical attributes.
+    """
+    prompt = f"Please analyze this grappling match image and provide an estimate of the {player_variable} athlete's "
+    prompt += "height and weight, plus any other grappling relevant attributes"
+    return prompt
+
 def get_attributes(image, player_variable):
     """
     Analyzes an image to estimate the physical attributes of an athlete.
+    
+    In-memory frames (raw JPEG bytes or a base64 data URL) are sent straight to the API,
+    so callers never need to write a temp file just to get attributes for a frame.
+    
+    Parameters:
+    -----------
+    image : str or bytes
+        Path to the image file, the raw image bytes, or a pre-encoded base64 data URL
+    player_variable : str
+        Which athlete to analyze ('top', 'bottom', or 'both')
+        
+    Returns:
+    --------
+    str
+        Debug info followed by "RESPONSE:" and the attribute estimate, or an error message
     """
     # Debug information
-    debug_info = f"Function called with:\nimage: {image}\nplayer_variable: {player_variable}\n"
+    debug_info = f"Function called with:\nimage: {_describe_image(image)}\nplayer_variable: {player_variable}\n"
     debug_info += f"API Key set in environment: {'Yes' if os.environ.get('OPENAI_API_KEY') else 'No'}\n"
     
     try:
@@ -1312,18 +1427,17 @@ def get_attributes(image, player_variable):
             return "Error: OpenAI API Key not found in environment variables"
         
         debug_info += f"Creating GenAI instance with API key: {api_key[:5]}...\n"
-        genai = GenAI(api_key)
+        genai = get_genai(api_key)
         
         # Create the prompt for athlete measurement estimation
-        prompt = f"Please analyze this grappling match image and provide an estimate of the {player_variable} athlete's "
-        prompt += "height and weight, plus any other grappling relevant attributes"
+        prompt = get_attributes_prompt(player_variable)
         debug_info += f"Created prompt: {prompt[:100]}...\n"
         
         # Check if image file exists
-        if not os.path.exists(image):
+        if _is_image_path(image) and not os.path.exists(image):
             return f"Error: Image file not found at {image}"
         
-        debug_info += f"Image file exists: {image}\n"
+        debug_info += f"Image available: {_describe_image(image)}\n"
         
         # Generate image description with physical measurements
         debug_info += "Calling generate_image_description...\n"
@@ -1337,9 +1451,9 @@ def get_attributes(image, player_variable):
         tb = traceback.format_exc()
         return f"Error analyzing attributes:\n{debug_info}\n\nException: {str(e)}\n\nTraceback:\n{tb}"
     
-def adversarial_game_plan(original_plan, ruleset="IBJJF", position="", measurables="", api_key=None):
+def adversarial_game_plan_prompt(original_plan, ruleset="IBJJF", position="", measurables="", bullets=False):
     """
-    Generates an adversarial game plan to counter a jiu-jitsu strategy.
+    Builds the prompt used by adversarial_game_plan and stream_adversarial_game_plan.
     
     Parameters:
     -----------
@@ -1351,36 +1465,21 @@ def adversarial_game_plan(original_plan, ruleset="IBJJF", position="", measurabl
         The starting position for the counter strategy
     measurables : str, optional
         Physical attributes and characteristics of the athlete
-    api_key : str, optional
-        OpenAI API key (defaults to environment variable)
+    bullets : bool, optional
+        Ask for exactly 3 short • bullet points (always uses the text format)
         
     Returns:
     --------
-    str
-        An adversarial game plan in the same format as the input (text or Mermaid)
+    tuple
+        (prompt, is_mermaid) where is_mermaid tells whether a Mermaid flowchart is requested
     """
-    # Debug information
-    debug_info = f"Function called with:\nruleset: {ruleset}\nposition: {position}\nmeasurables: {measurables}\n"
+    # Determine input format (Mermaid chart or text)
+    is_mermaid = not bullets and ("graph " in original_plan or "flowchart " in original_plan)
     
-    try:
-        # Get API key from environment if not provided
-        if not api_key:
-            api_key = os.environ.get("OPENAI_API_KEY", "")
-        if not api_key:
-            return "Error: OpenAI API Key not found in environment variables"
-        
-        # Initialize GenAI
-        debug_info += f"Creating GenAI instance with API key: {api_key[:5]}...\n"
-        genai = GenAI(api_key)
-        
-        # Determine input format (Mermaid chart or text)
-        is_mermaid = "graph " in original_plan or "flowchart " in original_plan
-        debug_info += f"Input format detected: {'Mermaid chart' if is_mermaid else 'Text'}\n"
-        
-        # Create prompt based on format
-        if is_mermaid:
-            # For Mermaid flowchart input
-            prompt = f"""Generate an adversarial Jiu-Jitsu game plan to counter the following technique flowchart.
+    # Create prompt based on format
+    if is_mermaid:
+        # For Mermaid flowchart input
+        prompt = f"""Generate an adversarial Jiu-Jitsu game plan to counter the following technique flowchart.
 
 ORIGINAL FLOWCHART:
 {original_plan}
@@ -1396,11 +1495,11 @@ INSTRUCTIONS:
 
 The counter strategy should follow {ruleset} rules.
 """
-            if measurables:
-                prompt += f"\nThe athlete has these attributes: {measurables}"
-            
-            # Add formatting guidelines
-            prompt += """
+        if measurables:
+            prompt += f"\nThe athlete has these attributes: {measurables}"
+        
+        # Add formatting guidelines
+        prompt += """
 Important formatting requirements:
 1. Use simple node IDs (A, B, C, etc.)
 2. PUT DOUBLE QUOTES around all node text and arrow labels
@@ -1408,9 +1507,9 @@ Important formatting requirements:
 4. Maximum of 16-20 nodes total
 5. Create transitions that branch outward from the center
 """
-        else:
-            # For text input
-            prompt = f"""Generate an adversarial Jiu-Jitsu game plan to counter the following strategy:
+    else:
+        # For text input
+        prompt = f"""Generate an adversarial Jiu-Jitsu game plan to counter the following strategy:
 
 ORIGINAL STRATEGY:
 {original_plan}
@@ -1425,19 +1524,72 @@ INSTRUCTIONS:
 
 The counter strategy should follow {ruleset} rules and start from the {position if position else 'appropriate'} position.
 """
-            if measurables:
-                prompt += f"\nThe counter athlete has these attributes: {measurables}"
+        if measurables:
+            prompt += f"\nThe counter athlete has these attributes: {measurables}"
+        
+        if bullets:
+            prompt += """
+Format your response as exactly 3 clear bullet points (using • bullet format).
+Keep each bullet point concise and action-oriented.
+Do not use asterisks (*) or dashes (-), and do not add anything besides the 3 bullet points.
+"""
+    
+    return prompt, is_mermaid
+
+def adversarial_game_plan(original_plan, ruleset="IBJJF", position="", measurables="", api_key=None, bullets=False, request_timeout=None):
+    """
+    Generates an adversarial game plan to counter a jiu-jitsu strategy.
+    
+    Parameters:
+    -----------
+    original_plan : str
+        The original game plan text or Mermaid flowchart to counter
+    ruleset : str, optional
+        The ruleset to use (e.g., "IBJJF", "MMA")
+    position : str, optional
+        The starting position for the counter strategy
+    measurables : str, optional
+        Physical attributes and characteristics of the athlete
+    api_key : str, optional
+        OpenAI API key (defaults to environment variable)
+    bullets : bool, optional
+        Ask for exactly 3 short • bullet points instead of a detailed plan, so callers that
+        display bullets don't need a second formatting request (always uses the text format)
+    request_timeout : float, optional
+        Seconds to wait for the API before retrying once (defaults to the SDK timeout)
+        
+    Returns:
+    --------
+    str
+        An adversarial game plan in the same format as the input (text or Mermaid)
+    """
+    # Debug information
+    debug_info = f"Function called with:\nruleset: {ruleset}\nposition: {position}\nmeasurables: {measurables}\n"
+    
+    try:
+        # Get API key from environment if not provided
+        if not api_key:
+            api_key = os.environ.get("OPENAI_API_KEY", "")
+        if not api_key:
+            return "Error: OpenAI API Key not found in environment variables"
+        
+        # Initialize GenAI
+        debug_info += f"Creating GenAI instance with API key: {api_key[:5]}...\n"
+        genai = get_genai(api_key)
+        
+        # Determine input format (Mermaid chart or text) and create the prompt
+        prompt, is_mermaid = adversarial_game_plan_prompt(original_plan, ruleset, position, measurables, bullets)
+        debug_info += f"Input format detected: {'Mermaid chart' if is_mermaid else 'Text'}\n"
         
         debug_info += f"Created prompt: {prompt[:100]}...\n"
         
         # Generate the adversarial game plan
         debug_info += "Calling generate_text...\n"
-        response = genai.generate_text(prompt)
+        response = genai.generate_text(prompt, request_timeout=request_timeout)
         debug_info += f"Response received from API: {response[:100]}...\n"
         
         # Clean up the response
-        if "[Debug:" in response:
-            response = response.split("[Debug:")[0].strip()
+        response = strip_debug(response)
         
         # For Mermaid, extract just the code
         if is_mermaid and "```" in response:
@@ -1458,6 +1610,120 @@ The counter strategy should follow {ruleset} rules and start from the {position
         tb = traceback.format_exc()
         return f"Error generating adversarial game plan:\n{debug_info}\n\nException: {str(e)}\n\nTraceback:\n{tb}"
 
+def stream_adversarial_game_plan(original_plan, ruleset="IBJJF", position="", measurables="", api_key=None, bullets=False, request_timeout=None):
+    """
+    Streaming variant of adversarial_game_plan for text strategies, yielding the counter strategy
+    as it is generated so it can be displayed before the whole response is ready.
+    
+    Parameters:
+    -----------
+    original_plan : str
+        The original game plan text to counter
+    ruleset : str, optional
+        The ruleset to use (e.g., "IBJJF", "MMA")
+    position : str, optional
+        The starting position for the counter strategy
+    measurables : str, optional
+        Physical attributes and characteristics of the athlete
+    api_key : str, optional
+        OpenAI API key (defaults to environment variable)
+    bullets : bool, optional
+        Ask for exactly 3 short • bullet points instead of a detailed plan
+    request_timeout : float, optional
+        Seconds to wait for the API before retrying once (defaults to the SDK timeout)
+        
+    Yields:
+    -------
+    str
+        Pieces of the counter strategy (without the DEBUG INFO wrapper)
+    """
+    if not api_key:
+        api_key = os.environ.get("OPENAI_API_KEY", "")
+    if not api_key:
+        raise RuntimeError("Error: OpenAI API Key not found in environment variables")
+    
+    prompt, _ = adversarial_game_plan_prompt(original_plan, ruleset, position, measurables, bullets)
+    yield from get_genai(api_key).stream_text(prompt, request_timeout=request_timeout)
+
+# Line separating the strategies in a batched adversarial game plan response
+ADVERSARIAL_BATCH_SEPARATOR = "---NEXT---"
+
+def adversarial_game_plan_batch(plans, ruleset="IBJJF", position="", api_key=None, request_timeout=None):
+    """
+    Generates several independent 3-bullet counter strategies with a single API request, for
+    callers that would otherwise send one adversarial_game_plan request per strategy.
+    
+    Parameters:
+    -----------
+    plans : list of tuple
+        (original_plan, measurables) pairs, one per counter strategy to generate
+    ruleset : str, optional
+        The ruleset to use (e.g., "IBJJF", "MMA")
+    position : str, optional
+        The starting position shared by all counter strategies
+    api_key : str, optional
+        OpenAI API key (defaults to environment variable)
+    request_timeout : float, optional
+        Seconds to wait for the API before retrying once (defaults to the SDK timeout)
+        
+    Returns:
+    --------
+    list or str
+        The counter strategies in the order of plans, or an error message if the request
+        failed or the response couldn't be split into one strategy per plan
+    """
+    # Debug information
+    debug_info = f"Function called with:\nplans: {len(plans)}\nruleset: {ruleset}\nposition: {position}\n"
+    
+    try:
+        # Get API key from environment if not provided
+        if not api_key:
+            api_key = os.environ.get("OPENAI_API_KEY", "")
+        if not api_key:
+            return "Error: OpenAI API Key not found in environment variables"
+        
+        genai = get_genai(api_key)
+        
+        # Marshal every strategy into one prompt, asking for the answers in input order
+        prompt = f"""Generate {len(plans)} independent adversarial Jiu-Jitsu counter strategies, one for each input below.
+
+INSTRUCTIONS:
+1. Analyze each original strategy and identify its key vulnerabilities and weaknesses
+2. Create a counter strategy that exploits these vulnerabilities
+3. Treat every input on its own; a counter strategy must not refer to the other inputs
+
+Every counter strategy should follow {ruleset} rules and start from the {position if position else 'appropriate'} position.
+"""
+        for n, (original_plan, measurables) in enumerate(plans, 1):
+            prompt += f"\nINPUT {n}:\nORIGINAL STRATEGY:\n{original_plan}\n"
+            if measurables:
+                prompt += f"The counter athlete has these attributes: {measurables}\n"
+        
+        prompt += f"""
+Format each counter strategy as exactly 3 clear bullet points (using • bullet format).
+Keep each bullet point concise and action-oriented.
+Do not use asterisks (*) or dashes (-) in the bullet points, and do not add anything besides them.
+Return the counter strategies in input order, separated by a line containing only {ADVERSARIAL_BATCH_SEPARATOR}
+"""
+        debug_info += f"Created prompt: {prompt[:100]}...\n"
+        
+        response = genai.generate_text(prompt, request_timeout=request_timeout)
+        if response.startswith("Error"):
+            return response
+        
+        # Clean up the response and split it into one strategy per input
+        response = strip_debug(response)
+        counters = [part.strip() for part in response.split(ADVERSARIAL_BATCH_SEPARATOR) if part.strip()]
+        if len(counters) != len(plans):
+            return f"Error: expected {len(plans)} counter strategies but got {len(counters)}\n{debug_info}"
+        
+        return counters
+    
+    except Exception as e:
+        import traceback
+        tb = traceback.format_exc()
+        return f"Error generating batched adversarial game plans:\n{debug_info}\n\nException: {str(e)}\n\nTraceback:\n{tb}"
+
 def format_strategy_for_display(strategy_text, role="initiator"):
     """
     Formats a strategy text for better display in the UI.
@@ -1762,7 +2028,7 @@ def format_strategy_for_display(strategy_text, bullet_style='bullet'):
         paragraphs = [p for p in strategy_text.split('\n\n') if p.strip()]
         
         if len(paragraphs) > 1:
-            return "\n".join([f"<p>{p.replace('\n', ' ')}</p>" for p in paragraphs])
+            return "\n".join(["<p>" + p.replace('\n', ' ') + "</p>" for p in paragraphs])
         else:
             # Look for line breaks and convert each line to a bullet point
             lines = [line.strip() for line in strategy_text.split('\n') if line.strip()]
@@ -1849,10 +2115,15 @@ def save_default_waiting_images():
     
     return hero_path, villain_path
 
-def trim_video(input_path, output_path, start_time, end_time):
+def trim_video(input_path, output_path, start_time, end_time, accurate=False):
     """
     Trims a video file to the specified time range.
     
+    By default the streams are copied without re-encoding, with the seek done on the input
+    so ffmpeg jumps straight to the nearest keyframe instead of reading the file from the start.
+    Stream copy can only cut on keyframes, so very short clips (under 2 seconds) or
+    accurate=True re-encode the range for frame-accurate cuts instead.
+    
     Parameters:
     -----------
     input_path : str
@@ -1863,6 +2134,8 @@ def trim_video(input_path, output_path, start_time, end_time):
         Start time in seconds
     end_time : float
         End time in seconds
+    accurate : bool, optional
+        Re-encode for frame-accurate cut points (slower)
         
     Returns:
     --------
@@ -1879,17 +2152,21 @@ def trim_video(input_path, output_path, start_time, end_time):
             return False
         
         # Execute ffmpeg command to trim the video
-        # -ss specifies the start time, -to specifies the end time
-        # -c copy copies the streams without re-encoding (fast)
+        # -ss before -i seeks in the input (keyframe jump), -t is the length of the clip
+        duration = end_time - start_time
         command = [
             "ffmpeg",
-            "-i", input_path,
-            "-ss", str(start_time),
-            "-to", str(end_time),
-            "-c", "copy",   # Use copy to avoid re-encoding
             "-y",           # Overwrite output file if it exists
-            output_path
+            "-ss", str(start_time),
+            "-i", input_path,
+            "-t", str(duration),
         ]
+        if accurate or duration < 2:
+            command += ["-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac"]
+        else:
+            # -c copy copies the streams without re-encoding (fast)
+            command += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+        command.append(output_path)
         
         # Execute the command
         process = subprocess.run(
@@ -7,9 +7,38 @@ import time
 import tempfile
 import subprocess
 import base64
+import io
+import functools
 from pathlib import Path
 from genai import GenAI
 
+# PyAV is optional; without it frames are extracted with the ffmpeg command line tool.
+# It is imported on first use so loading this module stays cheap.
+@functools.lru_cache(maxsize=None)
+def _load_av():
+    try:
+        import av
+    except ImportError:
+        return None
+    return av
+
+# Extracted frames are downscaled to fit MAX_FRAME_SIDE and re-encoded at a moderate JPEG
+# quality before upload; the vision model only needs the low-detail tile for these frames
+MAX_FRAME_SIDE = 768
+FRAME_JPEG_QUALITY = 75
+FRAME_DETAIL = "low"
+
+# Code fence opener the model sometimes wraps its HTML answer in
+HTML_FENCE = "```html"
+
+# Splits streamed text into the part that can be cleaned and shown now and a trailing partial
+# fence ("`", "``", "```ht", ...) that has to wait for the next delta to be recognized
+def _split_fence_tail(text):
+    for n in range(min(len(HTML_FENCE), len(text)), 0, -1):
+        if text.endswith(HTML_FENCE[:n]):
+            return text[:-n], text[-n:]
+    return text, ""
+
 class MovieAI(GenAI):
     """
     Enhanced MovieAI class that uses ffmpeg for video processing instead of cv2.
@@ -20,6 +49,7 @@ class MovieAI(GenAI):
         """
         super().__init__(openai_api_key)  # Initialize parent class (GenAI)
         self.ffmpeg_path = ffmpeg_path
+        self._probe_cache = {}
 
         # Check if FFmpeg is accessible
         if not shutil.which(self.ffmpeg_path):
@@ -30,6 +60,110 @@ class MovieAI(GenAI):
             else:
                 print("FFmpeg not found. Video processing features will be limited.")
     
+    def _probe_video(self, file_path):
+        """
+        Returns (fps, total_frames) for a video using ffprobe.
+        
+        Results are memoized per (path, size, mtime), so re-analyzing the same upload
+        skips the ffprobe subprocesses.
+        """
+        stat = os.stat(file_path)
+        cache_key = (file_path, stat.st_size, stat.st_mtime)
+        if cache_key in self._probe_cache:
+            return self._probe_cache[cache_key]
+        
+        # Get video information using ffprobe
+        probe_cmd = [
+            self.ffmpeg_path.replace('ffmpeg', 'ffprobe'),
+            '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'stream=r_frame_rate,nb_frames',
+            '-of', 'json',
+            file_path
+        ]
+        
+        try:
+            probe_output = subprocess.check_output(probe_cmd, stderr=subprocess.STDOUT, text=True)
+            video_info = json.loads(probe_output)
+            
+            # Parse frame rate
+            if 'streams' in video_info and video_info['streams']:
+                fps_str = video_info['streams'][0].get('r_frame_rate', '25/1')
+                if '/' in fps_str:
+                    num, den = map(int, fps_str.split('/'))
+                    fps = num / den
+                else:
+                    fps = float(fps_str)
+                
+                # Get total frames if available
+                total_frames = int(video_info['streams'][0].get('nb_frames', '0'))
+                if total_frames == 0:  # If ffprobe couldn't determine frame count
+                    # Estimate based on duration (fallback)
+                    duration_cmd = [
+                        self.ffmpeg_path.replace('ffmpeg', 'ffprobe'),
+                        '-v', 'error',
+                        '-show_entries', 'format=duration',
+                        '-of', 'json',
+                        file_path
+                    ]
+                    duration_output = subprocess.check_output(duration_cmd, stderr=subprocess.STDOUT, text=True)
+                    duration_info = json.loads(duration_output)
+                    if 'format' in duration_info and 'duration' in duration_info['format']:
+                        duration = float(duration_info['format']['duration'])
+                        total_frames = int(duration * fps)
+            else:
+                fps = 25  # Default fallback
+                total_frames = 1000  # Arbitrary fallback
+            
+        except (subprocess.CalledProcessError, json.JSONDecodeError, ValueError) as e:
+            print(f"Error getting video info: {str(e)}")
+            # Fallbacks are not memoized so a later call can probe again
+            return 25, 1000  # Default fps, arbitrary frame count
+        
+        self._probe_cache[cache_key] = (fps, total_frames)
+        return fps, total_frames
+    
+    def _extract_frames_av(self, file_path, max_samples):
+        """
+        Extract evenly spaced frames in-process with PyAV (seek to the nearest keyframe, then
+        decode forward to the sample time), avoiding the ffmpeg subprocess and temp files.
+        
+        Returns:
+        --------
+        tuple
+            (list of base64 encoded frames, number of frames, fps)
+        """
+        av = _load_av()
+        base64_frames = []
+        with av.open(file_path) as container:
+            stream = container.streams.video[0]
+            stream.thread_type = "AUTO"
+            fps = float(stream.average_rate) if stream.average_rate else 25
+            
+            if stream.duration and stream.time_base:
+                duration = float(stream.duration * stream.time_base)
+            elif container.duration:
+                duration = container.duration / av.time_base
+            else:
+                duration = 0
+            
+            for idx in range(max_samples):
+                sample_time = duration * idx / max_samples
+                container.seek(int(sample_time / stream.time_base), stream=stream)
+                for frame in container.decode(stream):
+                    if frame.time is None or frame.time >= sample_time:
+                        break
+                else:
+                    continue
+                
+                image = frame.to_image()
+                image.thumbnail((MAX_FRAME_SIDE, MAX_FRAME_SIDE))
+                buffer = io.BytesIO()
+                image.save(buffer, format="JPEG", quality=FRAME_JPEG_QUALITY)
+                base64_frames.append(base64.b64encode(buffer.getvalue()).decode('utf-8'))
+        
+        return base64_frames, len(base64_frames), fps
+    
     def extract_frames(self, file_path, max_samples=15, output_dir=None):
         """
         Extract frames from a video file using ffmpeg instead of cv2.
@@ -62,53 +196,19 @@ class MovieAI(GenAI):
                 print(f"Error: Video file not found at {file_path}")
                 return [], 0, 0
             
-            # Get video information using ffprobe
-            probe_cmd = [
-                self.ffmpeg_path.replace('ffmpeg', 'ffprobe'),
-                '-v', 'error',
-                '-select_streams', 'v:0',
-                '-show_entries', 'stream=r_frame_rate,nb_frames',
-                '-of', 'json',
-                file_path
-            ]
+            # Decode in-process with PyAV when available (frames aren't written to disk, so only
+            # when no output_dir was requested); fall back to the ffmpeg CLI on any failure
+            if temp_dir and _load_av() is not None:
+                try:
+                    base64_frames, nframes, fps = self._extract_frames_av(file_path, max_samples)
+                    if base64_frames:
+                        shutil.rmtree(temp_dir, ignore_errors=True)
+                        return base64_frames, nframes, fps
+                except Exception as av_err:
+                    print(f"PyAV frame extraction failed, falling back to ffmpeg: {str(av_err)}")
             
-            try:
-                probe_output = subprocess.check_output(probe_cmd, stderr=subprocess.STDOUT, text=True)
-                video_info = json.loads(probe_output)
-                
-                # Parse frame rate
-                if 'streams' in video_info and video_info['streams']:
-                    fps_str = video_info['streams'][0].get('r_frame_rate', '25/1')
-                    if '/' in fps_str:
-                        num, den = map(int, fps_str.split('/'))
-                        fps = num / den
-                    else:
-                        fps = float(fps_str)
-                    
-                    # Get total frames if available
-                    total_frames = int(video_info['streams'][0].get('nb_frames', '0'))
-                    if total_frames == 0:  # If ffprobe couldn't determine frame count
-                        # Estimate based on duration (fallback)
-                        duration_cmd = [
-                            self.ffmpeg_path.replace('ffmpeg', 'ffprobe'),
-                            '-v', 'error',
-                            '-show_entries', 'format=duration',
-                            '-of', 'json',
-                            file_path
-                        ]
-                        duration_output = subprocess.check_output(duration_cmd, stderr=subprocess.STDOUT, text=True)
-                        duration_info = json.loads(duration_output)
-                        if 'format' in duration_info and 'duration' in duration_info['format']:
-                            duration = float(duration_info['format']['duration'])
-                            total_frames = int(duration * fps)
-                else:
-                    fps = 25  # Default fallback
-                    total_frames = 1000  # Arbitrary fallback
-                
-            except (subprocess.CalledProcessError, json.JSONDecodeError, ValueError) as e:
-                print(f"Error getting video info: {str(e)}")
-                fps = 25  # Default fallback
-                total_frames = 1000  # Arbitrary fallback
+            # Get video information (probed once per file version, see _probe_video)
+            fps, total_frames = self._probe_video(file_path)
             
             # Calculate frame interval to extract approximately max_samples frames
             if total_frames > max_samples:
@@ -116,14 +216,17 @@ class MovieAI(GenAI):
             else:
                 frame_interval = 1
             
-            # Extract frames using ffmpeg
+            # Extract all sampled frames in a single ffmpeg pass; decoding stops after the last
+            # selected frame and the audio stream is ignored
             frames_path = os.path.join(output_dir, 'frame_%04d.jpg')
             extract_cmd = [
                 self.ffmpeg_path,
                 '-i', file_path,
-                '-vf', f'select=not(mod(n\\,{frame_interval}))',
+                '-an',
+                '-vf', (f'select=not(mod(n\\,{frame_interval})),'
+                        f"scale='min({MAX_FRAME_SIDE},iw)':'min({MAX_FRAME_SIDE},ih)':force_original_aspect_ratio=decrease"),
                 '-vsync', 'vfr',
-                '-q:v', '2',  # High quality JPG
+                '-q:v', '5',  # Roughly JPEG quality 75
                 '-frames:v', str(max_samples),
                 frames_path
             ]
@@ -157,6 +260,58 @@ class MovieAI(GenAI):
                 shutil.rmtree(temp_dir, ignore_errors=True)
             return [], 0, 0
     
+    def _video_description_params(self, fname_video, instructions, max_samples=15, model='gpt-4o-mini'):
+        """
+        Build the chat completion request used to describe a video from its extracted frames.
+        
+        Parameters:
+        -----------
+        fname_video : str
+            Path to the video file
+        instructions : str
+            Prompt instructions for analyzing the video
+        max_samples : int, optional
+            Maximum number of frames to extract
+        model : str, optional
+            Model to use for image analysis
+            
+        Returns:
+        --------
+        dict or None
+            Keyword arguments for chat.completions.create, or None if no frames could be extracted
+        """
+        # Extract frames
+        base64Frames, nframes, fps = self.extract_frames(fname_video, max_samples)
+        
+        if not base64Frames:
+            return None
+        
+        # Create content blocks for each frame
+        content_blocks = [{"type": "text", "text": instructions}]
+        
+        # Add a maximum of 5 frames to avoid exceeding token limits
+        sample_frames = base64Frames[:min(5, len(base64Frames))]
+        
+        for frame in sample_frames:
+            content_blocks.append({
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{frame}", "detail": FRAME_DETAIL}
+            })
+        
+        # Call the OpenAI API
+        PROMPT_MESSAGES = [
+            {
+                "role": "user",
+                "content": content_blocks
+            }
+        ]
+        
+        return {
+            "model": model,
+            "messages": PROMPT_MESSAGES,
+            "max_tokens": 1000,
+        }
+    
     def generate_video_description(self, fname_video, instructions, max_samples=15, model='gpt-4o-mini'):
         """
         Generate a description of a video file using extracted frames.
@@ -178,38 +333,11 @@ class MovieAI(GenAI):
             Video description
         """
         try:
-            # Extract frames
-            base64Frames, nframes, fps = self.extract_frames(fname_video, max_samples)
+            params = self._video_description_params(fname_video, instructions, max_samples, model)
             
-            if not base64Frames:
+            if params is None:
                 return self._get_sanitized_fallback_response(fname_video, instructions)
             
-            # Create content blocks for each frame
-            content_blocks = [{"type": "text", "text": instructions}]
-            
-            # Add a maximum of 5 frames to avoid exceeding token limits
-            sample_frames = base64Frames[:min(5, len(base64Frames))]
-            
-            for frame in sample_frames:
-                content_blocks.append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{frame}"}
-                })
-            
-            # Call the OpenAI API
-            PROMPT_MESSAGES = [
-                {
-                    "role": "user",
-                    "content": content_blocks
-                }
-            ]
-            
-            params = {
-                "model": model,
-                "messages": PROMPT_MESSAGES,
-                "max_tokens": 1000,
-            }
-            
             try:
                 completion = self.client.chat.completions.create(**params)
                 response = completion.choices[0].message.content
@@ -227,6 +355,126 @@ class MovieAI(GenAI):
             print(f"Error in generate_video_description: {str(e)}")
             return self._get_sanitized_fallback_response(fname_video, instructions)
     
+    def stream_video_description(self, fname_video, instructions, max_samples=15, model='gpt-4o-mini'):
+        """
+        Streaming variant of generate_video_description that yields the description as it is generated.
+        
+        Parameters:
+        -----------
+        fname_video : str
+            Path to the video file
+        instructions : str
+            Prompt instructions for analyzing the video
+        max_samples : int, optional
+            Maximum number of frames to analyze
+        model : str, optional
+            Model to use for image analysis
+            
+        Yields:
+        -------
+        str
+            Pieces of the video description, or the fallback response if the request fails
+            before any text was produced
+        """
+        produced = False
+        pending = ""
+        try:
+            params = self._video_description_params(fname_video, instructions, max_samples, model)
+            
+            if params is not None:
+                for chunk in self.client.chat.completions.create(stream=True, **params):
+                    if not chunk.choices:
+                        continue
+                    # Clean up the response as it arrives. A fence is usually split over several
+                    # deltas, so a possible partial fence at the end is carried over to the next one
+                    ready, pending = _split_fence_tail(pending + (chunk.choices[0].delta.content or ""))
+                    delta = ready.replace(HTML_FENCE, "").replace("```", "")
+                    if delta:
+                        produced = True
+                        yield delta
+        except Exception as e:
+            print(f"Error in stream_video_description: {str(e)}")
+        
+        # Whatever was held back at the end of the stream
+        delta = pending.replace(HTML_FENCE, "").replace("```", "")
+        if delta:
+            produced = True
+            yield delta
+        
+        if not produced:
+            yield self._get_sanitized_fallback_response(fname_video, instructions)
+    
+    def analyze_frames(self, frames, instructions, model='gpt-4o-mini'):
+        """
+        Analyze several frames with a single multimodal request instead of one request per frame.
+        A single frame is sent as a plain image request with the instructions as they are.
+        
+        Parameters:
+        -----------
+        frames : list
+            Base64 encoded JPEG frames
+        instructions : str
+            Prompt applied to every frame
+        model : str, optional
+            Model to use for image analysis
+            
+        Returns:
+        --------
+        list
+            One analysis (or error message) per frame, in input order. If the model's answer
+            can't be parsed, the raw answer is returned for the first frame instead
+        """
+        if not frames:
+            return []
+        
+        try:
+            image_blocks = [{
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{frame}", "detail": FRAME_DETAIL}
+            } for frame in frames]
+            
+            if len(frames) == 1:
+                completion = self.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": [{"type": "text", "text": instructions}] + image_blocks}],
+                    max_tokens=1000,
+                )
+                return [completion.choices[0].message.content or ""]
+            
+            content_blocks = [{
+                "type": "text",
+                "text": f"{instructions}\n\nApply these instructions to each of the {len(frames)} images separately, in order. "
+                        'Return a JSON object of the form {"frames": ["analysis of image 1", "analysis of image 2", ...]} '
+                        "with exactly one string per image."
+            }] + image_blocks
+            
+            completion = self.client.chat.completions.create(
+                model=model,
+                response_format={"type": "json_object"},
+                messages=[{"role": "user", "content": content_blocks}],
+                max_tokens=1000 * len(frames),
+            )
+            response = completion.choices[0].message.content
+            
+            try:
+                analyses = json.loads(response)["frames"]
+                if not isinstance(analyses, list) or not all(isinstance(analysis, str) for analysis in analyses):
+                    raise ValueError("frames is not a list of strings")
+            except (ValueError, KeyError, TypeError) as parse_err:
+                print(f"analyze_frames could not parse the response: {str(parse_err)}")
+                analyses = [response]
+            
+            if len(analyses) != len(frames):
+                print(f"analyze_frames expected {len(frames)} analyses, got {len(analyses)}")
+            
+            results = analyses[:len(frames)]
+            results += [f"Error: No analysis returned for frame {idx+1}" for idx in range(len(results), len(frames))]
+            return results
+            
+        except Exception as e:
+            print(f"Error in analyze_frames: {str(e)}")
+            return [f"Error analyzing frames: {str(e)}"] * len(frames)
+    
     def _get_sanitized_fallback_response(self, video_path, instructions):
         """
         Generate a sanitized fallback response when video analysis fails.